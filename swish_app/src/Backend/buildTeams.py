@@ -1,139 +1,186 @@
 """
 Build teams.json with CURRENT standings
 Quick version - just updates team records
+Run: python buildTeams.py [--json]
+
+Only teams whose wins/losses/win_pct/conference/division changed are patched,
+and teams.json isn't written at all when none did. --json prints a summary
+(success, changed teams with before/after, written) for /api/refresh-teams.
 """
 
+import argparse
 import json
+import sys
 import time
 from datetime import datetime
 from pathlib import Path
-from nba_api.stats.static import teams
-from nba_api.stats.endpoints import leaguestandingsv3
+
+import jsonfile
+import metrics
+from core import all_teams, get_current_season, lazy_import
+
+pd = lazy_import("pandas")
+leaguestandingsv3 = lazy_import("nba_api.stats.endpoints.leaguestandingsv3")
+
+METRICS_PATH = Path('data/teams.metrics.json')
 
 DELAY = 2.0
+BACKUPS = 3  # previous teams.json versions kept in data/.backups/
+RECORD_FIELDS = ['wins', 'losses', 'win_pct', 'conference', 'division']
 
-def get_current_season():
-    """Get the actual current NBA season"""
-    # The NBA season is YYYY-YY format, e.g., "2024-25"
-    # Season starts in October, so if we're past October, it's the new season
-    now = datetime.now()
-    year = now.year
-    month = now.month
-    
-    # If we're in October-December, the season is current_year to next_year
-    # If we're in Jan-September, the season started last year
-    if month >= 10:
-        season = f"{year}-{str(year+1)[-2:]}"
-    else:
-        season = f"{year-1}-{str(year)[-2:]}"
-    
-    return season
+def load_teams(teams_path):
+    """Existing teams.json, or a fresh list from nba_api's static teams"""
+    if teams_path.exists():
+        print(f"📂 Loading existing {teams_path}")
+        with open(teams_path, 'r') as f:
+            return json.load(f)
+
+    # Create from scratch using static teams
+    print("📂 No existing teams.json, creating from static data")
+    return [
+        {
+            'id': team['id'],
+            'name': team['nickname'],
+            'full_name': team['full_name'],
+            'abbreviation': team['abbreviation'],
+            'city': team['city'],
+            'state': team['state'],
+            'year_founded': team['year_founded'],
+        }
+        for team in all_teams()
+    ]
+
+def diff_records(teams_data, standings_df):
+    """Keyed join of teams.json against the standings.
+
+    Returns {team id: {field: new value}} for the teams whose record fields
+    differ, and (before, after) records for the summary.
+    """
+    standings = pd.DataFrame({
+        'id': standings_df['TeamID'].astype(int),
+        'wins': standings_df['WINS'].astype(int),
+        'losses': standings_df['LOSSES'].astype(int),
+        'win_pct': standings_df['WinPCT'].astype(float),
+        'conference': standings_df.get('Conference', pd.Series('', index=standings_df.index)),
+        'division': standings_df.get('Division', pd.Series('', index=standings_df.index)),
+    })
+    current = pd.DataFrame(
+        [{'id': t['id'], **{f: t.get(f) for f in RECORD_FIELDS}} for t in teams_data],
+        columns=['id', *RECORD_FIELDS],
+    )
+    merged = current.merge(standings, on='id', how='inner', suffixes=('_old', ''))
+
+    changed = pd.Series(False, index=merged.index)
+    for f in RECORD_FIELDS:
+        # Missing old values (a new teams.json) count as changed
+        changed |= merged[f].ne(merged[f'{f}_old']) | merged[f'{f}_old'].isna()
+    merged = merged[changed]
+
+    patches = {}
+    for row in merged.to_dict('records'):
+        after = {f: row[f] for f in RECORD_FIELDS}
+        after['wins'], after['losses'] = int(after['wins']), int(after['losses'])
+        after['win_pct'] = float(after['win_pct'])
+        patches[int(row['id'])] = after
+    return patches, len(standings)
 
 def update_team_records():
-    """Fetch current standings and update teams.json"""
-    
+    """Fetch current standings and patch changed records into teams.json.
+
+    Returns a summary dict (see --json), with success False if the
+    standings couldn't be fetched.
+    """
     season = get_current_season()
+    teams_path = Path('data/teams.json')
+    summary = {
+        'success': False,
+        'season': season,
+        'fetched_at': datetime.now().isoformat(timespec='seconds'),
+        'path': str(teams_path),
+        'written': False,
+        'changed': [],
+    }
     print(f"📅 Current NBA Season: {season}")
     print(f"⏰ Fetching standings as of: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
     
     # Get standings
     print("🔄 Fetching league standings...")
     try:
-        standings = leaguestandingsv3.LeagueStandingsV3(
-            season=season,
-            season_type='Regular Season'
-        )
-        time.sleep(DELAY)
-        
-        df = standings.get_data_frames()[0]
+        with metrics.span("fetch_standings"):
+            standings = leaguestandingsv3.LeagueStandingsV3(
+                season=season,
+                season_type='Regular Season'
+            )
+            time.sleep(DELAY)
+
+            df = standings.get_data_frames()[0]
         print(f"✅ Got standings for {len(df)} teams\n")
         
     except Exception as e:
         print(f"❌ Error fetching standings: {e}")
-        return False
+        summary['error'] = str(e)
+        return summary
     
-    # Build standings map
-    standings_map = {}
-    for _, row in df.iterrows():
-        team_id = row['TeamID']
-        standings_map[team_id] = {
-            'wins': int(row['WINS']),
-            'losses': int(row['LOSSES']),
-            'win_pct': float(row['WinPCT']),
-            'conference': row.get('Conference', ''),
-            'division': row.get('Division', ''),
-        }
-    
-    # Load existing teams.json
-    teams_path = Path('data/teams.json')
-    
-    if teams_path.exists():
-        print(f"📂 Loading existing {teams_path}")
-        with open(teams_path, 'r') as f:
-            teams_data = json.load(f)
-    else:
-        # Create from scratch using static teams
-        print("📂 No existing teams.json, creating from static data")
-        all_teams = teams.get_teams()
-        teams_data = []
-        
-        for team in all_teams:
-            teams_data.append({
+    with metrics.span("merge"):
+        teams_data = load_teams(teams_path)
+        patches, n_standings = diff_records(teams_data, df)
+
+        # Patch only the teams whose record changed
+        print("\n🔄 Updating team records...")
+        for team in teams_data:
+            after = patches.get(team['id'])
+            if after is None:
+                continue
+            before = {f: team.get(f) for f in RECORD_FIELDS}
+            team.update(after)
+            summary['changed'].append({
                 'id': team['id'],
-                'name': team['nickname'],
-                'full_name': team['full_name'],
-                'abbreviation': team['abbreviation'],
-                'city': team['city'],
-                'state': team['state'],
-                'year_founded': team['year_founded'],
+                'abbreviation': team.get('abbreviation'),
+                'before': before,
+                'after': after,
             })
-    
-    # Update records
-    print("\n🔄 Updating team records...")
-    updated_count = 0
-    
-    for team in teams_data:
-        team_id = team['id']
-        
-        if team_id in standings_map:
-            old_record = f"{team.get('wins', '?')}-{team.get('losses', '?')}"
-            new_data = standings_map[team_id]
-            
-            team['wins'] = new_data['wins']
-            team['losses'] = new_data['losses']
-            team['win_pct'] = new_data['win_pct']
-            team['conference'] = new_data['conference']
-            team['division'] = new_data['division']
-            
-            new_record = f"{new_data['wins']}-{new_data['losses']}"
-            
-            if old_record != new_record:
-                print(f"  ✓ {team['full_name']}: {old_record} → {new_record}")
-                updated_count += 1
-            else:
-                print(f"  - {team['full_name']}: {new_record} (no change)")
-    
+            old_record = f"{before['wins']}-{before['losses']}" if before['wins'] is not None else "?-?"
+            print(f"  ✓ {team['full_name']}: {old_record} → {after['wins']}-{after['losses']}")
+        print(f"  - {n_standings - len(patches)} teams unchanged")
+
+    summary['success'] = True
+    summary['teams'] = len(teams_data)
+    if not patches and teams_path.exists():
+        print(f"\n✅ No record changes, {teams_path} left as is")
+        return summary
+
     # Save updated teams.json
-    teams_path.parent.mkdir(exist_ok=True)
-    
-    with open(teams_path, 'w') as f:
-        json.dump(teams_data, f, indent=2)
+    with metrics.span("save"):
+        summary['written'] = jsonfile.write_json(teams_path, teams_data, backups=BACKUPS)
     
-    print(f"\n✅ Updated {updated_count} team records")
-    print(f"💾 Saved to {teams_path}")
+    print(f"\n✅ Updated {len(patches)} team records")
+    print(f"💾 Saved to {teams_path}" if summary['written'] else f"💾 {teams_path} unchanged, nothing to write")
     print(f"📊 Total teams: {len(teams_data)}")
     
-    return True
+    return summary
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Update team records in teams.json")
+    parser.add_argument('--merge', action='store_true',
+                        help="patch records into the existing teams.json (the default; kept "
+                             "for server.js)")
+    parser.add_argument('--json', action='store_true',
+                        help="print only a JSON summary on stdout; progress goes to stderr")
+    args = parser.parse_args()
+
+    stdout = sys.stdout
+    if args.json:
+        sys.stdout = sys.stderr
+
+    summary = {'success': False}
     try:
         print("="*60)
         print("NBA TEAMS RECORD UPDATER")
         print("="*60 + "\n")
         
-        success = update_team_records()
+        summary = update_team_records()
         
-        if success:
+        if summary['success']:
             print("\n" + "="*60)
             print("✅ SUCCESS - Teams data is now up to date!")
             print("="*60)
@@ -142,7 +189,14 @@ if __name__ == '__main__':
             
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
+        summary['error'] = 'interrupted'
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+        summary['error'] = str(e)
+    finally:
+        metrics.write(METRICS_PATH, script="buildTeams.py")
+        if args.json:
+            json.dump(summary, stdout)
+            stdout.write("\n")
@@ -0,0 +1,172 @@
+"""
+Record/replay HTTP cassette for deterministic offline runs.
+
+    SWISH_HTTP=record  SWISH_CASSETTE=cassettes/nightly  python predictions/generate.py
+    SWISH_HTTP=replay  SWISH_CASSETTE=cassettes/nightly  python predictions/generate.py
+
+A cassette is a directory holding bodies.pack (zlib-compressed response bodies,
+appended as they arrive) and index.json (request key -> offset, length, status,
+headers). The key is the method plus the URL with its query string sorted.
+Record mode passes requests through and stores each response. Replay mode
+serves responses from disk and fails any request the cassette doesn't have,
+as if the network were down.
+
+Importing this module installs the hook into requests (which nba_api uses) when
+SWISH_HTTP is set. Other clients call lookup()/record() themselves; see
+predictions/boxscore_fetcher.py. Messages go to stderr because some scripts'
+stdout is parsed by server.js.
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import zlib
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+MODE = os.environ.get("SWISH_HTTP", "").lower() or None  # None, "record" or "replay"
+DEFAULT_PATH = Path(__file__).parent / "cassettes" / "default"
+
+
+def request_key(method, url, body=None):
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    key = f"{method.upper()} {urlunsplit(parts._replace(query=query, fragment=''))}"
+    if body:
+        key += f" #{zlib.crc32(body if isinstance(body, bytes) else body.encode()):08x}"
+    return key
+
+
+class Cassette:
+    """Append-only store of recorded HTTP responses."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.pack_path = self.path / "bodies.pack"
+        self.index_path = self.path / "index.json"
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.index = {}
+        if self.index_path.exists():
+            with open(self.index_path, "r") as f:
+                self.index = json.load(f)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, key):
+        """(status, headers, body bytes) for a recorded request, or None."""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        with open(self.pack_path, "rb") as f:
+            f.seek(entry["offset"])
+            body = zlib.decompress(f.read(entry["length"]))
+        return entry["status"], entry["headers"], body
+
+    def put(self, key, status, headers, body):
+        blob = zlib.compress(body, 6)
+        with self._lock:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with open(self.pack_path, "ab") as f:
+                offset = f.tell()
+                f.write(blob)
+            self.index[key] = {
+                "offset": offset, "length": len(blob), "status": status,
+                "headers": {k: v for k, v in headers.items()
+                            if k.lower() not in ("content-encoding", "content-length",
+                                                 "transfer-encoding")},
+            }
+            self._dirty = True
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.index_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(self.index, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+            self._dirty = False
+
+
+_cassette = None
+
+
+def active():
+    """The loaded cassette when SWISH_HTTP is record or replay, else None."""
+    global _cassette
+    if MODE in ("record", "replay") and _cassette is None:
+        _cassette = Cassette(os.environ.get("SWISH_CASSETTE") or DEFAULT_PATH)
+        atexit.register(_cassette.flush)
+        print(f"[cassette] {MODE} {_cassette.path} ({len(_cassette)} recorded)", file=sys.stderr)
+    return _cassette
+
+
+def replaying():
+    return MODE == "replay" and active() is not None
+
+
+def recording():
+    return MODE == "record" and active() is not None
+
+
+def lookup(method, url, body=None):
+    """Recorded (status, headers, body) for a request in replay mode, or None."""
+    return active().get(request_key(method, url, body))
+
+
+def record(method, url, status, headers, body, request_body=None):
+    active().put(request_key(method, url, request_body), status, dict(headers), body)
+
+
+class CassetteMiss(Exception):
+    """Replay mode: the request was never recorded."""
+
+
+def _install_requests_hook():
+    try:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from requests.structures import CaseInsensitiveDict
+    except ImportError:
+        return
+    send = HTTPAdapter.send
+
+    class ReplayMiss(CassetteMiss, requests.ConnectionError):
+        pass
+
+    def cassette_send(self, request, **kwargs):
+        if replaying():
+            hit = lookup(request.method, request.url, request.body)
+            if hit is None:
+                raise ReplayMiss(f"not in cassette: {request.method} {request.url}", request=request)
+            status, headers, body = hit
+            response = requests.Response()
+            response.status_code = status
+            response.headers = CaseInsensitiveDict(headers)
+            response._content = body
+            response.url = request.url
+            response.request = request
+            response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+            response.reason = "Replayed"
+            return response
+
+        response = send(self, request, **kwargs)
+        if recording() and not kwargs.get("stream"):
+            record(request.method, request.url, response.status_code, response.headers,
+                   response.content, request.body)
+        return response
+
+    HTTPAdapter.send = cassette_send
+
+
+if MODE:
+    if MODE not in ("record", "replay"):
+        raise ValueError(f"SWISH_HTTP must be 'record' or 'replay', not {MODE!r}")
+    _install_requests_hook()
@@ -0,0 +1,18 @@
+"""
+Helpers shared by the backend scripts: NBA season strings, cached team lookups
+and lazy imports of heavy dependencies.
+
+Importing this package costs almost nothing. nba_api, pandas and friends are
+only loaded when something first needs them. See core/startup.py to measure
+each entry point's cold start.
+"""
+
+from .lazy import lazy_import
+from .seasons import get_current_season, season_label, season_range
+from .teams import abbr_by_id, all_teams, name_by_abbr, name_by_id
+
+__all__ = [
+    "lazy_import",
+    "get_current_season", "season_label", "season_range",
+    "all_teams", "name_by_id", "abbr_by_id", "name_by_abbr",
+]
@@ -0,0 +1,23 @@
+"""Module proxies that import on first attribute access."""
+
+import importlib
+import sys
+import types
+
+
+class _LazyModule(types.ModuleType):
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        # Later lookups hit the copied attributes and skip __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name):
+    """`name` as a module whose import is deferred until it's first used.
+
+    Returns the real module if it's already imported.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
@@ -0,0 +1,20 @@
+"""NBA season strings ('2025-26')."""
+
+from datetime import datetime
+
+
+def season_label(start_year):
+    """2025 -> '2025-26'."""
+    return f"{start_year}-{str(start_year + 1)[-2:]}"
+
+
+def get_current_season(now=None):
+    """The season in progress (or about to start): it turns over in October."""
+    now = now or datetime.now()
+    return season_label(now.year if now.month >= 10 else now.year - 1)
+
+
+def season_range(current, history):
+    """`history` completed seasons before `current`, oldest first, then `current`."""
+    start = int(current[:4])
+    return [season_label(y) for y in range(start - history, start + 1)]
@@ -0,0 +1,93 @@
+"""
+Cold-start times for the backend entry points.
+
+Usage (from src/Backend): python -m core.startup [--runs 5] [--importtime SCRIPT]
+
+Each entry point is imported in a fresh interpreter, so nothing is already in
+sys.modules. Two numbers are reported:
+- import: the time from the first import until the module is loaded
+- total: the whole process, including interpreter start-up
+
+That is what a script pays before doing any real work, e.g. what server.js
+waits on every time it spawns fetch_box_score.py. --importtime SCRIPT lists
+that script's slowest imports (python -X importtime).
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# name -> script, relative to src/Backend
+ENTRY_POINTS = {
+    "fetch_box_score": "fetch_box_score.py",
+    "fetch_live_data": "fetch_live_data.py",
+    "buildTeams": "buildTeams.py",
+    "updatePlayerStats": "updatePlayerStats.py",
+    "generate": "predictions/generate.py",
+    "backtest": "predictions/backtest.py",
+    "tune": "predictions/tune.py",
+    "bench": "predictions/bench.py",
+}
+
+_PROBE = (
+    "import sys, time; t = time.perf_counter(); sys.path.insert(0, {dir!r}); "
+    "import {module}; print(time.perf_counter() - t)"
+)
+
+
+def _probe(script):
+    path = BACKEND_DIR / script
+    return [sys.executable, "-c", _PROBE.format(dir=str(path.parent), module=path.stem)]
+
+
+def measure(script, runs):
+    """Median (import seconds, total seconds) over `runs` fresh interpreters."""
+    imports, totals = [], []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        out = subprocess.run(_probe(script), capture_output=True, text=True, check=True,
+                             cwd=(BACKEND_DIR / script).parent)
+        totals.append(time.perf_counter() - t0)
+        imports.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(imports), statistics.median(totals)
+
+
+def slowest_imports(script, top=15):
+    """(cumulative µs, module) for the slowest imports, from -X importtime."""
+    cmd = _probe(script)
+    out = subprocess.run([cmd[0], "-X", "importtime", *cmd[1:]], capture_output=True,
+                         text=True, check=True, cwd=(BACKEND_DIR / script).parent)
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        rows.append((int(cumulative), module.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", choices=list(ENTRY_POINTS), metavar="SCRIPT",
+                        help="show the slowest imports of one entry point")
+    args = parser.parse_args()
+
+    if args.importtime:
+        for cumulative, module in slowest_imports(ENTRY_POINTS[args.importtime]):
+            print(f"{cumulative / 1000:>9.1f} ms  {module}")
+        return
+
+    print(f"{'entry point':<20} {'import ms':>10} {'total ms':>10}")
+    for name, script in ENTRY_POINTS.items():
+        import_s, total_s = measure(script, args.runs)
+        print(f"{name:<20} {import_s * 1000:>10.1f} {total_s * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
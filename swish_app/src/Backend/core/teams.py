@@ -0,0 +1,29 @@
+"""NBA team lookups, built once from nba_api's static team list."""
+
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def all_teams():
+    """nba_api's static team dicts, sorted by team id."""
+    from nba_api.stats.static import teams
+
+    return tuple(sorted(teams.get_teams(), key=lambda t: t["id"]))
+
+
+@lru_cache(maxsize=None)
+def name_by_id():
+    """Team id -> full name ('Atlanta Hawks')."""
+    return {t["id"]: t["full_name"] for t in all_teams()}
+
+
+@lru_cache(maxsize=None)
+def abbr_by_id():
+    """Team id -> tricode ('ATL')."""
+    return {t["id"]: t["abbreviation"] for t in all_teams()}
+
+
+@lru_cache(maxsize=None)
+def name_by_abbr():
+    """Tricode -> full name."""
+    return {t["abbreviation"]: t["full_name"] for t in all_teams()}
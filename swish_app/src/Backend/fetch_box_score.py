@@ -1,7 +1,11 @@
 # Backend/fetch_box_score.py
 import sys
 import json
-import requests
+
+import cassette  # SWISH_HTTP=record|replay
+from core import lazy_import
+
+requests = lazy_import("requests")
 
 def fetch_and_format(game_id):
     url = f"https://cdn.nba.com/static/json/liveData/boxscore/boxscore_{game_id}.json"
@@ -1,10 +1,27 @@
 # Backend/fetch_live_scores.py
-from nba_api.live.nba.endpoints import scoreboard
-import json
 from datetime import datetime
-import os
 from pathlib import Path
 
+import jsonfile
+from core import lazy_import
+
+scoreboard = lazy_import("nba_api.live.nba.endpoints.scoreboard")
+
+# Current: src/Backend/fetch_live_scores.py
+BACKEND_DIR = Path(__file__).parent.absolute()  # src/Backend
+PROJECT_ROOT = BACKEND_DIR.parent.parent  # project root (swish_app)
+OUTPUT_PATHS = [
+    BACKEND_DIR / 'data' / 'live_scores.json',
+    # ROOT public/data for frontend (OUTSIDE src/)
+    PROJECT_ROOT / 'public' / 'data' / 'live_scores.json',
+]
+
+def save_live_scores(output):
+    """Write live_scores.json to Backend/data and public/data"""
+    for path in OUTPUT_PATHS:
+        jsonfile.write_json(path, output)
+        print(f"✅ Saved to {path}")
+
 def get_live_scores():
     """Fetch today's games and their current status"""
     try:
@@ -54,27 +71,7 @@ def get_live_scores():
             'games': games_list
         }
         
-        # Navigate to project root
-        # Current: src/Backend/fetch_live_scores.py
-        backend_dir = Path(__file__).parent.absolute()  # src/Backend
-        src_dir = backend_dir.parent  # src
-        project_root = src_dir.parent  # project root (swish_app)
-        
-        # Save to Backend/data
-        backend_data_dir = backend_dir / 'data'
-        backend_data_dir.mkdir(exist_ok=True)
-        backend_file = backend_data_dir / 'live_scores.json'
-        with open(backend_file, 'w') as f:
-            json.dump(output, f, indent=2)
-        print(f"✅ Saved to {backend_file}")
-
-        # Save to ROOT public/data for frontend (OUTSIDE src/)
-        public_data_dir = project_root / 'public' / 'data'
-        public_data_dir.mkdir(parents=True, exist_ok=True)
-        public_file = public_data_dir / 'live_scores.json'
-        with open(public_file, 'w') as f:
-            json.dump(output, f, indent=2)
-        print(f"✅ Saved to {public_file}")
+        save_live_scores(output)
         
         print(f"🏀 Successfully fetched {len(games_list)} games")
         return output
@@ -85,22 +82,8 @@ def get_live_scores():
         traceback.print_exc()
         
         # Create empty file if error occurs
-        backend_dir = Path(__file__).parent.absolute()
-        src_dir = backend_dir.parent
-        project_root = src_dir.parent
-        
         output = {'last_updated': datetime.now().isoformat(), 'games': []}
-        
-        # Save to both locations
-        backend_data_dir = backend_dir / 'data'
-        backend_data_dir.mkdir(exist_ok=True)
-        with open(backend_data_dir / 'live_scores.json', 'w') as f:
-            json.dump(output, f, indent=2)
-            
-        public_data_dir = project_root / 'public' / 'data'
-        public_data_dir.mkdir(parents=True, exist_ok=True)
-        with open(public_data_dir / 'live_scores.json', 'w') as f:
-            json.dump(output, f, indent=2)
+        save_live_scores(output)
         
         return output
 
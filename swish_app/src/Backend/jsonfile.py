@@ -0,0 +1,98 @@
+"""
+Shared writer for the JSON files the app serves (players.json, teams.json,
+live_scores.json, predict.json).
+
+write_json() writes minified JSON to a temp file and renames it over the
+target, so server.js never sends a half-written file. Next to the file it
+keeps:
+- <name>.gz and <name>.br: precompressed copies for server.js to send as-is
+  (.br only when the brotli package is installed)
+- <name>.etag: hash of the JSON, used as the HTTP ETag and to skip a write
+  whose content hasn't changed
+
+The siblings and the sidecar are written before the JSON is renamed into place,
+and the JSON gets the sidecar's mtime. A sidecar is only trusted while it is at
+least as new as the JSON, so a reader never pairs a new ETag with an old body,
+and a JSON replaced by anything else drops back to the plain file.
+
+With backups=N, the replaced version is kept as .backups/<stem>.<hash>.json.
+An identical version is only stored once, and only the newest N are kept.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BACKUP_DIR = ".backups"
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+
+def _replace(path, data, mtime_ns=None):
+    tmp_path = path.with_name(f".{path.name}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if mtime_ns is not None:
+        os.utime(tmp_path, ns=(mtime_ns, mtime_ns))
+    os.replace(tmp_path, path)
+
+
+def current_hash(path):
+    """Hash of the JSON at `path` from its sidecar (or the file itself), or None."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    etag_path = path.with_name(path.name + ".etag")
+    if etag_path.exists() and etag_path.stat().st_mtime >= path.stat().st_mtime:
+        return etag_path.read_text().strip()
+    return content_hash(path.read_bytes())
+
+
+def _backup(path, digest, keep):
+    backup_dir = path.parent / BACKUP_DIR
+    backup_dir.mkdir(exist_ok=True)
+    target = backup_dir / f"{path.stem}.{digest[:12]}{path.suffix}"
+    if not target.exists():
+        shutil.copy2(path, target)
+    target.touch()  # newest first, even if this content was seen before
+    backups = sorted(backup_dir.glob(f"{path.stem}.*{path.suffix}"),
+                     key=lambda p: p.stat().st_mtime, reverse=True)
+    for old in backups[keep:]:
+        old.unlink(missing_ok=True)
+
+
+def write_json(path, data, backups=0, default=None):
+    """Write `data` as minified JSON unless the file already holds it.
+
+    Returns True if the file was written, False if it was unchanged.
+    """
+    path = Path(path)
+    body = json.dumps(data, separators=(",", ":"), default=default).encode("utf-8")
+    digest = content_hash(body)
+    old_digest = current_hash(path)
+    if digest == old_digest:
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if backups and old_digest is not None:
+        _backup(path, old_digest, backups)
+
+    _replace(path.with_name(path.name + ".gz"), gzip.compress(body, 9, mtime=0))
+    if brotli is not None:
+        _replace(path.with_name(path.name + ".br"), brotli.compress(body, quality=11))
+    etag_path = path.with_name(path.name + ".etag")
+    _replace(etag_path, digest.encode())
+    _replace(path, body, mtime_ns=etag_path.stat().st_mtime_ns)
+    return True
@@ -0,0 +1,160 @@
+"""
+Structured per-stage metrics for the backend scripts.
+
+Wrap each stage in `with metrics.span("name"):`. A span records:
+- wall and CPU time
+- the process's peak RSS so far
+- HTTP requests and response bytes made by the span's thread
+- any counters bumped with metrics.count() (cache_hits, cache_misses, retries, ...)
+
+metrics.write(path) dumps every span plus run totals as JSON.
+
+HTTP is counted by hooking requests' HTTPAdapter.send, which covers nba_api.
+The hook goes in when the first span opens, so importing metrics doesn't pull
+in requests. Code using other clients (aiohttp) reports through
+metrics.count("http_requests").
+
+Set SWISH_PROFILE=1 to also dump a cProfile file per span next to the metrics
+file and to add tracemalloc peak/top allocations to each span.
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROFILE = os.environ.get("SWISH_PROFILE") == "1"
+
+_lock = threading.Lock()
+_local = threading.local()
+_spans = []
+_totals = {}
+_started = time.time()
+_profiles = {}
+_hooked = False
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _counters():
+    """Counters for the current thread."""
+    if not hasattr(_local, "counters"):
+        _local.counters = {}
+    return _local.counters
+
+
+def count(name, n=1):
+    """Add `n` to a counter, attributed to the current thread's open span."""
+    counters = _counters()
+    counters[name] = counters.get(name, 0) + n
+    with _lock:
+        _totals[name] = _totals.get(name, 0) + n
+
+
+@contextmanager
+def span(name):
+    _install_requests_hook()
+    before = dict(_counters())
+    wall0, cpu0 = time.perf_counter(), time.process_time()
+    profiler = None
+    if PROFILE:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another span's profiler is active (Python 3.12+)
+            profiler = None
+    record = {"name": name, "thread": threading.current_thread().name,
+              "started_at": round(time.time() - _started, 3)}
+    try:
+        yield record
+        record["ok"] = True
+    except BaseException:
+        record["ok"] = False
+        raise
+    finally:
+        if PROFILE:
+            if profiler is not None:
+                profiler.disable()
+                _profiles[name] = profiler
+            snapshot = tracemalloc.take_snapshot()
+            record["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            record["tracemalloc_top"] = [
+                f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} {stat.size / 1e6:.2f} MB"
+                for stat in snapshot.statistics("lineno")[:5]
+            ]
+        record["wall_s"] = round(time.perf_counter() - wall0, 4)
+        record["cpu_s"] = round(time.process_time() - cpu0, 4)
+        record["peak_rss_mb"] = _peak_rss_mb()
+        after = _counters()
+        record["counters"] = {
+            k: after[k] - before.get(k, 0) for k in sorted(after) if after[k] != before.get(k, 0)
+        }
+        with _lock:
+            _spans.append(record)
+
+
+def write(path, script=None):
+    """Write all spans and run totals as JSON (plus .prof files when profiling)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        "script": script or Path(sys.argv[0]).name,
+        "generated_at": datetime.now().isoformat(),
+        "wall_s": round(time.time() - _started, 3),
+        "cpu_s": round(time.process_time(), 3),
+        "peak_rss_mb": _peak_rss_mb(),
+        "totals": dict(sorted(_totals.items())),
+        "spans": _spans,
+    }
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
+
+    for name, profiler in _profiles.items():
+        profiler.dump_stats(path.with_name(f"{path.stem}.{name}.prof"))
+    return report
+
+
+def _install_requests_hook():
+    global _hooked
+    if _hooked:
+        return
+    _hooked = True
+    try:
+        from requests.adapters import HTTPAdapter
+    except ImportError:
+        return
+    if getattr(HTTPAdapter.send, "_metrics_hook", False):
+        return
+    send = HTTPAdapter.send
+
+    def counting_send(self, request, **kwargs):
+        count("http_requests")
+        response = send(self, request, **kwargs)
+        if not kwargs.get("stream"):
+            count("http_bytes", len(response.content or b""))
+        return response
+
+    counting_send._metrics_hook = True
+    HTTPAdapter.send = counting_send
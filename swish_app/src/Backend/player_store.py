@@ -0,0 +1,172 @@
+"""
+SQLite player store (data/players.sqlite), with players.json as an export view.
+
+One typed row per player, keyed by id and indexed by team_id and active. Point
+and range lookups (get, by_team, active, between) return the same dicts as
+players.json. update_many() only writes rows whose values actually changed,
+and export_json() writes players.json through jsonfile, which in turn skips
+the write when nothing changed.
+
+The database itself is not committed. players.json stays the checked-in copy the
+frontend imports, so open_store() seeds the store from it. It re-imports
+whenever players.json was changed by something other than export_json()
+(a git pull, scripts/buildTeams.js).
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+import jsonfile
+
+PROFILE_COLUMNS = {
+    "full_name": "TEXT", "first_name": "TEXT", "last_name": "TEXT", "position": "TEXT",
+    "jersey_number": "TEXT", "height": "TEXT", "weight": "TEXT", "birthdate": "TEXT",
+    "school": "TEXT", "country": "TEXT", "draft_year": "TEXT", "draft_round": "TEXT",
+    "draft_number": "TEXT", "team_id": "INTEGER", "team_name": "TEXT",
+    "team_abbreviation": "TEXT",
+}
+STAT_COLUMNS = {
+    "gp": "INTEGER", "mpg": "REAL", "ppg": "REAL", "rpg": "REAL", "apg": "REAL",
+    "spg": "REAL", "bpg": "REAL", "topg": "REAL", "fgpct": "REAL", "fg3pct": "REAL",
+    "ftpct": "REAL", "fgm": "REAL", "fga": "REAL", "fg3m": "REAL", "fg3a": "REAL",
+    "ftm": "REAL", "fta": "REAL", "oreb": "REAL", "dreb": "REAL", "pf": "REAL",
+}
+COLUMNS = {"id": "INTEGER PRIMARY KEY", **PROFILE_COLUMNS, **STAT_COLUMNS,
+           "active": "INTEGER NOT NULL DEFAULT 0"}
+# Not exported: `ord` keeps players.json's order, `extra` holds unknown keys as JSON
+INTERNAL = {"ord": "INTEGER NOT NULL", "extra": "TEXT"}
+
+
+class PlayerStore:
+    """Id-keyed player table with team and active-flag indexes."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path)
+        cols = ", ".join(f"{name} {decl}" for name, decl in {**COLUMNS, **INTERNAL}.items())
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS players ({cols});
+            CREATE INDEX IF NOT EXISTS players_team ON players (team_id, active);
+            CREATE INDEX IF NOT EXISTS players_active ON players (active);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM players").fetchone()[0]
+
+    def _select(self, where="", params=()):
+        cursor = self._conn.execute(
+            f"SELECT {', '.join(COLUMNS)}, extra FROM players {where} ORDER BY ord", params
+        )
+        return [_to_dict(row) for row in cursor]
+
+    def get(self, player_id):
+        rows = self._select("WHERE id = ?", (player_id,))
+        return rows[0] if rows else None
+
+    def by_team(self, team_id, active=None):
+        if active is None:
+            return self._select("WHERE team_id = ?", (team_id,))
+        return self._select("WHERE team_id = ? AND active = ?", (team_id, int(active)))
+
+    def active(self):
+        return self._select("WHERE active = 1")
+
+    def between(self, column, lo=None, hi=None):
+        """Players with lo <= column <= hi (either bound optional), e.g. between('ppg', 20)."""
+        if column not in COLUMNS:
+            raise ValueError(f"Unknown player column: {column}")
+        clauses, params = [f"{column} IS NOT NULL"], []
+        if lo is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(lo)
+        if hi is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(hi)
+        return self._select("WHERE " + " AND ".join(clauses), params)
+
+    def all(self):
+        return self._select()
+
+    def import_players(self, players):
+        """Replace the table with a players.json-style list."""
+        rows = [_to_row(p, i) for i, p in enumerate(players)]
+        names = list(COLUMNS) + list(INTERNAL)
+        with self._conn:
+            self._conn.execute("DELETE FROM players")
+            self._conn.executemany(
+                f"INSERT INTO players ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})",
+                rows,
+            )
+
+    def update_many(self, changes):
+        """Apply {player id: {column: value}}; only rows that differ are written.
+
+        Returns the ids of the rows that changed.
+        """
+        changed = []
+        with self._conn:
+            for player_id, fields in changes.items():
+                unknown = set(fields) - set(COLUMNS)
+                if unknown:
+                    raise ValueError(f"Unknown player columns: {sorted(unknown)}")
+                values = [int(v) if k == "active" else v for k, v in fields.items()]
+                sets = ", ".join(f"{k} = ?" for k in fields)
+                differs = " OR ".join(f"{k} IS NOT ?" for k in fields)
+                cursor = self._conn.execute(
+                    f"UPDATE players SET {sets} WHERE id = ? AND ({differs})",
+                    [*values, player_id, *values],
+                )
+                if cursor.rowcount:
+                    changed.append(player_id)
+        return changed
+
+    def export_json(self, path, backups=0):
+        """Write players.json from the store. Returns True if the file changed."""
+        written = jsonfile.write_json(path, self.all(), backups=backups)
+        self._set_meta("exported_hash", jsonfile.current_hash(path))
+        return written
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        with self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def close(self):
+        self._conn.close()
+
+
+def open_store(path, json_path):
+    """Open the store, (re)importing players.json if the store hasn't seen this version."""
+    store = PlayerStore(path)
+    json_hash = jsonfile.current_hash(json_path)
+    if json_hash is not None and json_hash != store._get_meta("exported_hash"):
+        with open(json_path, "r") as f:
+            store.import_players(json.load(f))
+        store._set_meta("exported_hash", json_hash)
+        print(f"📥 Imported {len(store)} players from {json_path} into {store.path}")
+    return store
+
+
+def _to_row(player, ord_):
+    extra = {k: v for k, v in player.items() if k not in COLUMNS}
+    return (*[int(player.get(k) or 0) if k == "active" else player.get(k) for k in COLUMNS],
+            ord_, json.dumps(extra) if extra else None)
+
+
+def _to_dict(row):
+    *values, extra = row
+    player = dict(zip(COLUMNS, values))
+    player["active"] = bool(player["active"])
+    # Players without a season row have no stat keys at all in players.json
+    if player["gp"] is None:
+        for k in STAT_COLUMNS:
+            del player[k]
+    if extra:
+        player.update(json.loads(extra))
+    return player
@@ -0,0 +1,14 @@
+"""
+Puts Backend/ on sys.path, so the scripts here can import the modules they share
+with the other backend scripts (core, metrics, cassette, jsonfile, ...).
+
+Import it before any of those modules.
+"""
+
+import sys
+from pathlib import Path
+
+BACKEND_DIR = str(Path(__file__).resolve().parents[1])
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
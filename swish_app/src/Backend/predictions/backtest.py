@@ -0,0 +1,159 @@
+"""
+Walk-forward backtest for the game predictor.
+
+For every game date in a season, trains on build_matchups() rows from earlier
+dates only and predicts that day's games. Folds run in parallel on a process
+pool. Workers share one memory-mapped feature matrix instead of each getting a
+pickled copy of it. The model uses the same parameters as generate.py, including
+any tuned ones in cache/model/params.json.
+
+Usage: python backtest.py [--season 2025-26 | --synthetic-seasons N] [--workers N]
+Output: cache/backtest/report.json
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.metrics import accuracy_score, brier_score_loss, log_loss
+from xgboost import XGBClassifier
+
+import generate
+import synthetic
+from gamelog_store import GameLogStore
+
+BACKTEST_DIR = generate.CACHE_DIR / "backtest"
+
+# Set once per worker process by _init_worker
+_X = None
+_y = None
+_params = None
+
+
+def _init_worker(x_path, y_path, params):
+    global _X, _y, _params
+    _X = np.load(x_path, mmap_mode="r")
+    _y = np.load(y_path, mmap_mode="r")
+    _params = params
+
+
+def _run_fold(fold):
+    """Train on rows [0, train_end) and score rows [train_end, test_end)."""
+    date, train_end, test_end = fold
+    t0 = time.perf_counter()
+    model = XGBClassifier(**_params, n_jobs=1)
+    model.fit(_X[:train_end], _y[:train_end])
+    probs = model.predict_proba(_X[train_end:test_end])[:, 1]
+    y_true = np.asarray(_y[train_end:test_end])
+    return {
+        "date": date,
+        "n_train": int(train_end),
+        "n_test": int(test_end - train_end),
+        "accuracy": float(accuracy_score(y_true, probs > 0.5)),
+        "log_loss": float(log_loss(y_true, probs, labels=[0, 1])),
+        "brier": float(brier_score_loss(y_true, probs)),
+        "seconds": time.perf_counter() - t0,
+        "probs": probs.tolist(),
+    }
+
+
+def load_matchups(season, synthetic_seasons):
+    if synthetic_seasons:
+        season_df = synthetic.generate_game_logs(n_seasons=synthetic_seasons).query(
+            "SEASON == SEASON.max()"
+        )
+    else:
+        store = GameLogStore(generate.GAMELOG_STORE_PATH)
+        season_df = store.load(season)
+        store.close()
+        if season_df.empty:
+            raise SystemExit(f"No stored game logs for {season}; run generate.py first")
+    df = generate.build_pre_game_stats(generate.engineer_features(season_df))
+    return generate.build_matchups(df)
+
+
+def save_matrix(matchup_df, out_dir):
+    """Write the feature matrix and labels as .npy files for workers to memory-map."""
+    features, X, y = generate._split_features(matchup_df)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    x_path = out_dir / "X.npy"
+    y_path = out_dir / "y.npy"
+    np.save(x_path, X.to_numpy(dtype=np.float32))
+    np.save(y_path, y.to_numpy(dtype=np.int8))
+    return features, X, y, str(x_path), str(y_path)
+
+
+def make_folds(dates, min_train):
+    """One fold per game date with at least `min_train` earlier matchups."""
+    folds = []
+    boundaries = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1], True])
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        if start >= min_train:
+            folds.append((str(dates[start])[:10], int(start), int(end)))
+    return folds
+
+
+def run_backtest(matchup_df, workers=None, min_train=100):
+    features, X, y, x_path, y_path = save_matrix(matchup_df, BACKTEST_DIR)
+
+    folds = make_folds(matchup_df["GAME_DATE"].to_numpy(), min_train)
+    if not folds:
+        raise SystemExit(f"Not enough matchups ({len(X)}) for min_train={min_train}")
+    workers = workers or os.cpu_count()
+    print(f"  {len(folds)} folds, {len(X)} matchups, {workers} workers")
+
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(x_path, y_path, generate.XGB_PARAMS)) as pool:
+        results = list(pool.map(_run_fold, folds))
+    wall = time.perf_counter() - t0
+
+    y_all = y.to_numpy()[folds[0][1]:folds[-1][2]]
+    probs_all = np.concatenate([r.pop("probs") for r in results])
+    summary = {
+        "folds": len(results),
+        "predictions": int(len(probs_all)),
+        "accuracy": float(accuracy_score(y_all, probs_all > 0.5)),
+        "log_loss": float(log_loss(y_all, probs_all, labels=[0, 1])),
+        "brier": float(brier_score_loss(y_all, probs_all)),
+        "wall_seconds": wall,
+        "fold_seconds": sum(r["seconds"] for r in results),
+        "features": features,
+        "params": generate.XGB_PARAMS,
+    }
+    return summary, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the game predictor.")
+    parser.add_argument("--season", default=generate.get_current_season())
+    parser.add_argument("--synthetic-seasons", type=int, default=0,
+                        help="backtest the last of N synthetic seasons instead of stored logs")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--min-train", type=int, default=100,
+                        help="minimum earlier matchups before a date is scored")
+    args = parser.parse_args()
+
+    generate.apply_tuned_params()
+    matchup_df = load_matchups(args.season, args.synthetic_seasons)
+    summary, folds = run_backtest(matchup_df, workers=args.workers, min_train=args.min_train)
+
+    print(f"\n  {'date':<10} {'train':>6} {'games':>5} {'acc':>6} {'logloss':>8} {'brier':>6} {'secs':>5}")
+    for r in folds:
+        print(f"  {r['date']:<10} {r['n_train']:>6} {r['n_test']:>5} {r['accuracy']:>6.1%} "
+              f"{r['log_loss']:>8.3f} {r['brier']:>6.3f} {r['seconds']:>5.2f}")
+    print(f"\n  Overall: accuracy {summary['accuracy']:.2%}, log-loss {summary['log_loss']:.4f}, "
+          f"Brier {summary['brier']:.4f} over {summary['predictions']} games")
+    print(f"  Wall time {summary['wall_seconds']:.1f}s ({summary['fold_seconds']:.1f}s of fold time)")
+
+    report_path = BACKTEST_DIR / "report.json"
+    with open(report_path, "w") as f:
+        json.dump({"summary": summary, "folds": folds}, f, indent=2)
+    print(f"  Report: {report_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""
+Benchmarks for the prediction pipeline on synthetic league data.
+
+Usage: python bench.py {features,pregame} [--seasons 1,2,5,10] [--repeat 3]
+       python bench.py suite [--seasons 1,5] [--save-baseline] [--time-tolerance 0.25]
+       python bench.py boxscores [--games 600] [--throttle-rate 0.05] [--capacity 32]
+
+`suite` times every compute stage (engineer_features, build_pre_game_stats,
+build_matchups, train_model, compute_injury_scores, predict_slate), measures
+each one's tracemalloc peak and compares both against the saved baseline. It
+exits 1 if any stage got slower or bigger than the tolerance allows. tracemalloc
+only sees Python allocations, so XGBoost's native buffers are not counted.
+Baselines depend on the machine, so they live in the cache rather than in the repo.
+
+`boxscores` runs the async boxscore fetcher against a local stand-in for the
+NBA CDN. The stand-in answers 429 to a random `--throttle-rate` of requests and
+to every request past `--capacity` in flight. It exits 1 if a boxscore is lost
+or concurrency collapses to the minimum.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import generate
+import synthetic
+from boxscore_fetcher import fetch_boxscores_async
+from player_index import PlayerIndex
+from team_state import TeamState
+
+BASELINE_PATH = generate.CACHE_DIR / "bench" / "baseline.json"
+TIME_TOLERANCE = 0.25
+MEMORY_TOLERANCE = 0.10
+# Below these, differences are timer and allocator noise
+MIN_SECONDS = 0.02
+MIN_MEMORY_MB = 0.5
+
+
+def _best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_features(season_counts, repeat):
+    """Time engineer_features() as the number of seasons grows."""
+    print(f"{'seasons':>8} {'rows':>8} {'seconds':>9} {'us/row':>8}")
+    for n in season_counts:
+        logs = synthetic.generate_game_logs(n_seasons=n)
+        secs = _best_of(lambda: generate.engineer_features(logs.copy()), repeat)
+        print(f"{n:>8} {len(logs):>8} {secs:>9.3f} {secs / len(logs) * 1e6:>8.1f}")
+
+
+def _reference_pre_game_stats(df):
+    """Original per-group lambda implementation of build_pre_game_stats().
+
+    Kept as the regression oracle: the native-kernel version must match it exactly.
+    """
+    df = df.sort_values(['TEAM_NAME', 'GAME_DATE']).reset_index(drop=True)
+    g = df.groupby('TEAM_NAME')
+    for col, new_col in [('PTS', 'PRE_PTS_avg'), ('AST', 'PRE_AST_avg'),
+                          ('REB', 'PRE_REB_avg'), ('FG_PCT', 'PRE_FG_PCT')]:
+        df[new_col] = g[col].transform(lambda x: x.expanding().mean().shift(1))
+    df['RECENT_WIN_PCT'] = g['WIN'].transform(lambda x: x.shift(1).rolling(5, min_periods=1).mean())
+    df['PRE_WIN_STREAK'] = g['WIN_STREAK'].transform(lambda x: x.shift(1).fillna(0))
+    df['PRE_HOME_PCT'] = g['HOME_VENUE_PCT'].transform(lambda x: x.shift(1).fillna(0))
+    df['PRE_ROAD_PCT'] = g['ROAD_VENUE_PCT'].transform(lambda x: x.shift(1).fillna(0))
+    df['PRE_WIN_PCT'] = g['WIN'].transform(lambda x: x.expanding().mean().shift(1).fillna(0))
+    df['DAYS_REST'] = g['GAME_DATE'].transform(lambda x: (x.diff().dt.days - 1).fillna(1))
+    df['BACK_TO_BACK'] = (df['DAYS_REST'] == 0).astype(int)
+    h2h = df.groupby(['TEAM_NAME', 'OPP_TEAM_NAME'])
+    df['H2H_GAMES'] = h2h.cumcount()
+    df['H2H_WINS'] = h2h['WIN'].transform(lambda x: x.cumsum().shift(1).fillna(0))
+    return df
+
+
+def bench_pregame(season_counts, repeat):
+    """Time build_pre_game_stats() against the reference and check they match exactly."""
+    print(f"{'seasons':>8} {'rows':>8} {'native s':>9} {'lambda s':>9} {'speedup':>8}")
+    for n in season_counts:
+        df = generate.engineer_features(synthetic.generate_game_logs(n_seasons=n))
+        pd.testing.assert_frame_equal(
+            generate.build_pre_game_stats(df), _reference_pre_game_stats(df), check_exact=True,
+        )
+        native = _best_of(lambda: generate.build_pre_game_stats(df), repeat)
+        reference = _best_of(lambda: _reference_pre_game_stats(df), repeat)
+        print(f"{n:>8} {len(df):>8} {native:>9.3f} {reference:>9.3f} {reference / native:>7.1f}x")
+
+
+def _measure(fn, repeat):
+    """(result, best seconds, tracemalloc peak MB) of fn(), with its prints silenced."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        try:
+            result = fn()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        # Timed separately: tracing slows allocation-heavy code several times over
+        seconds = _best_of(fn, repeat)
+    return result, seconds, peak / 1e6
+
+
+def _slate(team_state, n_games=15):
+    """A full slate pairing up every team, like a busy night on the scoreboard."""
+    names = sorted(team_state.teams)[:2 * n_games]
+    return [{"home": h, "away": a, "home_rest": 1, "away_rest": 0, "status": "7:30 pm ET"}
+            for h, a in zip(names[::2], names[1::2])]
+
+
+def run_suite(n_seasons, repeat):
+    """Benchmark each stage on `n_seasons` of synthetic data. Returns {stage: result}."""
+    logs = synthetic.generate_game_logs(n_seasons=n_seasons)
+    players = synthetic.generate_player_stats(logs)
+    injuries = synthetic.generate_injuries(players)
+    results = {}
+
+    def stage(name, rows, fn):
+        value, seconds, peak_mb = _measure(fn, repeat)
+        results[name] = {"rows": rows, "seconds": round(seconds, 4), "peak_mb": round(peak_mb, 2)}
+        return value
+
+    df = stage("engineer_features", len(logs), lambda: generate.engineer_features(logs.copy()))
+    pre = stage("build_pre_game_stats", len(df), lambda: generate.build_pre_game_stats(df))
+    matchup_df = stage("build_matchups", len(pre), lambda: generate.build_matchups(pre))
+
+    features, X, y = generate._split_features(matchup_df)
+    X = X.to_numpy(dtype=np.float32)
+    y = y.to_numpy(dtype=np.int8)
+    w = np.ones(len(y), dtype=np.float32)
+    model, _ = stage("train_model", len(y), lambda: generate.train_model(features, X, y, w))
+
+    player_index = PlayerIndex(players)
+    scores, details = stage("compute_injury_scores", len(injuries),
+                            lambda: generate.compute_injury_scores(injuries, player_index))
+
+    season = logs["SEASON"].max()
+    team_state = TeamState(season)
+    team_state.apply(df[df["SEASON"] == season])
+    games = _slate(team_state)
+    stage("predict_slate", len(games),
+          lambda: generate.predict_slate(model, features, team_state, games, scores, details))
+    return results
+
+
+def compare(results, baseline, time_tolerance, memory_tolerance):
+    """Print results next to the baseline and return the regressions past tolerance."""
+    regressions = []
+    print(f"{'seasons':>8} {'stage':<22} {'rows':>8} {'seconds':>9} {'base s':>9} "
+          f"{'peak MB':>9} {'base MB':>9}")
+    for key, r in results.items():
+        n, name = key.split(":")
+        base = baseline.get(key)
+        flags = []
+        if base:
+            if r["seconds"] > max(base["seconds"] * (1 + time_tolerance), MIN_SECONDS):
+                flags.append(f"time +{r['seconds'] / max(base['seconds'], 1e-6) - 1:.0%}")
+            if r["peak_mb"] > base["peak_mb"] * (1 + memory_tolerance) + MIN_MEMORY_MB:
+                flags.append(f"memory +{r['peak_mb'] / max(base['peak_mb'], 1e-6) - 1:.0%}")
+        base_s = f"{base['seconds']:.3f}" if base else "-"
+        base_mb = f"{base['peak_mb']:.1f}" if base else "-"
+        print(f"{n:>8} {name:<22} {r['rows']:>8} {r['seconds']:>9.3f} {base_s:>9} "
+              f"{r['peak_mb']:>9.1f} {base_mb:>9}  {' '.join(flags)}")
+        regressions.extend(f"{key} {flag}" for flag in flags)
+    return regressions
+
+
+def bench_suite(season_counts, repeat, baseline_path, save_baseline,
+                time_tolerance, memory_tolerance):
+    """Run the stage suite and check it against the baseline. Returns an exit code."""
+    results = {}
+    for n in season_counts:
+        print(f"  Running {n}-season suite...")
+        for name, r in run_suite(n, repeat).items():
+            results[f"{n}:{name}"] = r
+
+    baseline = {}
+    if baseline_path.exists() and not save_baseline:
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, time_tolerance, memory_tolerance)
+
+    if save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = baseline_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "saved_at": datetime.now().isoformat(),
+                "machine": f"{platform.machine()} python {platform.python_version()} "
+                           f"numpy {np.__version__} pandas {pd.__version__}",
+                "results": results,
+            }, f, indent=2)
+        os.replace(tmp_path, baseline_path)
+        print(f"\n💾 Baseline saved to {baseline_path}")
+        return 0
+    if not baseline:
+        print(f"\n⚠️  No baseline at {baseline_path}; run with --save-baseline first")
+        return 0
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) past tolerance "
+              f"(time {time_tolerance:.0%}, memory {memory_tolerance:.0%}):")
+        for reg in regressions:
+            print(f"  {reg}")
+        return 1
+    print("\n✅ No regressions against baseline")
+    return 0
+
+
+async def _stand_in_fetch(n_games, throttle_rate, capacity, latency, seed):
+    from aiohttp import web
+
+    rng = np.random.default_rng(seed)
+    server = {"in_flight": 0, "served": 0, "throttled": 0}
+
+    async def boxscore(request):
+        game_id = request.match_info["game_id"]
+        if server["in_flight"] >= capacity or rng.random() < throttle_rate:
+            server["throttled"] += 1
+            return web.Response(status=429)
+        server["in_flight"] += 1
+        try:
+            await asyncio.sleep(latency)
+        finally:
+            server["in_flight"] -= 1
+        server["served"] += 1
+        return web.json_response({"game": {"gameId": game_id}})
+
+    app = web.Application()
+    app.router.add_get("/boxscore_{game_id}.json", boxscore)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        game_ids = [f"{i:010d}" for i in range(n_games)]
+        results, stats = await fetch_boxscores_async(
+            game_ids, url_template=f"http://127.0.0.1:{port}/boxscore_{{game_id}}.json",
+            backoff_base=0.05, backoff_cap=0.5,
+        )
+    finally:
+        await runner.cleanup()
+    lost = [gid for gid in game_ids if (results.get(gid) or {}).get("gameId") != gid]
+    return stats, server, lost
+
+
+def bench_boxscores(n_games, throttle_rate, capacity, latency, seed=0):
+    """Fetch `n_games` boxscores from a local stand-in CDN. Returns an exit code."""
+    print(f"  Fetching {n_games} boxscores from a stand-in CDN "
+          f"({throttle_rate:.0%} random 429s, capacity {capacity}, {latency * 1000:.0f}ms latency)...")
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats, server, lost = asyncio.run(
+            _stand_in_fetch(n_games, throttle_rate, capacity, latency, seed))
+    print(f"  {stats['requests']} requests in {stats['elapsed']:.2f}s "
+          f"({stats['requests_per_sec']:.0f}/s), {stats['throttled']} throttled, "
+          f"{stats['retries']} retries")
+    print(f"  Concurrency: peak {stats['peak_concurrency']}, final {stats['final_concurrency']}")
+
+    if lost:
+        print(f"\n❌ {len(lost)} boxscore(s) not fetched, e.g. {lost[0]}")
+        return 1
+    if stats["peak_concurrency"] <= 1 or stats["final_concurrency"] <= 1:
+        print("\n❌ Concurrency collapsed to 1")
+        return 1
+    print("\n✅ All boxscores fetched")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("benchmark", choices=["features", "pregame", "suite", "boxscores"])
+    parser.add_argument("--seasons", default=None,
+                        help="comma-separated season counts to benchmark "
+                             "(default 1,2,5,10; 1,5 for suite)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH,
+                        help="baseline JSON for suite (default cache/bench/baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store this suite run as the baseline instead of comparing")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE,
+                        help="allowed slowdown per stage as a fraction (default 0.25)")
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE,
+                        help="allowed peak-memory growth per stage as a fraction (default 0.10)")
+    parser.add_argument("--games", type=int, default=600,
+                        help="boxscores to fetch from the stand-in CDN (default 600)")
+    parser.add_argument("--throttle-rate", type=float, default=0.05,
+                        help="share of stand-in requests answered with a random 429 (default 0.05)")
+    parser.add_argument("--capacity", type=int, default=32,
+                        help="requests the stand-in serves at once before answering 429 (default 32)")
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="stand-in response time in seconds (default 0.02)")
+    args = parser.parse_args()
+
+    if args.benchmark == "boxscores":
+        sys.exit(bench_boxscores(args.games, args.throttle_rate, args.capacity, args.latency))
+
+    default_seasons = "1,5" if args.benchmark == "suite" else "1,2,5,10"
+    season_counts = [int(n) for n in (args.seasons or default_seasons).split(",")]
+    if args.benchmark == "features":
+        bench_features(season_counts, args.repeat)
+    elif args.benchmark == "pregame":
+        bench_pregame(season_counts, args.repeat)
+    elif args.benchmark == "suite":
+        sys.exit(bench_suite(season_counts, args.repeat, args.baseline, args.save_baseline,
+                             args.time_tolerance, args.memory_tolerance))
+
+
+if __name__ == "__main__":
+    main()
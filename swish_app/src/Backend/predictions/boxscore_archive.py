@@ -0,0 +1,87 @@
+"""
+Packed on-disk archive of final NBA CDN boxscores.
+
+A boxscore never changes once its game is final (gameStatus == 3), so each one
+only needs to be downloaded once. Boxscores are stored zlib-compressed and
+appended to a single pack file; a small JSON index maps game_id -> [offset, length].
+"""
+
+import json
+import os
+import zlib
+from pathlib import Path
+
+
+class BoxscoreArchive:
+    """Append-only boxscore store keyed by game_id."""
+
+    def __init__(self, path):
+        path = Path(path)
+        self.pack_path = path.with_suffix(".pack")
+        self.index_path = path.with_suffix(".idx.json")
+        self._index = {}
+        self._dirty = False
+
+        if self.index_path.exists() and self.pack_path.exists():
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            # Drop entries pointing past the end of the pack (interrupted write)
+            pack_size = self.pack_path.stat().st_size
+            self._index = {
+                gid: loc for gid, loc in index.items()
+                if loc[0] + loc[1] <= pack_size
+            }
+
+    def __contains__(self, game_id):
+        return game_id in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def game_ids(self):
+        """All archived game IDs, in pack order."""
+        return sorted(self._index, key=lambda gid: self._index[gid][0])
+
+    def get(self, game_id):
+        """Return the archived boxscore dict, or None if not archived."""
+        return next(iter(self.get_many([game_id])), (game_id, None))[1]
+
+    def get_many(self, game_ids):
+        """Yield (game_id, boxscore) for each archived ID, reading the pack in one pass."""
+        locs = sorted(
+            ((self._index[gid], gid) for gid in game_ids if gid in self._index),
+        )
+        if not locs:
+            return
+        with open(self.pack_path, "rb") as f:
+            for (offset, length), gid in locs:
+                f.seek(offset)
+                yield gid, json.loads(zlib.decompress(f.read(length)))
+
+    def put(self, game_id, game):
+        """Append a boxscore to the pack. Call flush() to persist the index."""
+        if game_id in self._index:
+            return
+        blob = zlib.compress(json.dumps(game, separators=(",", ":")).encode(), 6)
+        self.pack_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.pack_path, "ab") as f:
+            offset = f.tell()
+            f.write(blob)
+        self._index[game_id] = [offset, len(blob)]
+        self._dirty = True
+
+    def flush(self):
+        """Atomically rewrite the index if anything was added."""
+        if not self._dirty:
+            return
+        tmp_path = self.index_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
@@ -0,0 +1,162 @@
+"""
+Async NBA CDN boxscore fetcher.
+
+Uses one pooled keep-alive aiohttp session for all requests. Concurrency adapts
+AIMD-style: it grows by one slot after a run of successes and halves on 429/5xx,
+at most once per congestion window. Failed requests retry with exponential
+backoff and full jitter. A body that isn't valid boxscore JSON is a failure, not
+a sign of congestion, so it is retried without touching the limit.
+
+The URL template is configurable so the fetcher can be pointed at a local
+stand-in server serving canned boxscores.
+"""
+
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+
+import backend_path
+import cassette
+
+BOXSCORE_URL = "https://cdn.nba.com/static/json/liveData/boxscore/boxscore_{game_id}.json"
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class AdaptiveLimiter:
+    """Concurrency limit that ramps up on success and backs off on throttling.
+
+    A congestion window runs from one decrease until a full limit's worth of
+    requests has started after it. 429s from requests started inside that
+    window were already answered by the decrease, so they don't halve the
+    limit again. `async with limiter as ticket` hands out the request's ticket.
+    """
+
+    def __init__(self, initial=8, minimum=1, maximum=64, ramp_after=10):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.ramp_after = ramp_after
+        self.in_flight = 0
+        self.peak = 0
+        self._started = 0
+        self._window_end = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            self._started += 1
+            return self._started
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        """Add a slot per `ramp_after` successes, or per round of `limit` when lower."""
+        self._successes += 1
+        if self._successes >= min(self.ramp_after, self.limit) and self.limit < self.maximum:
+            self.limit += 1
+            self._successes = 0
+
+    def on_throttle(self, ticket):
+        """Halve the limit, unless this request's window was already halved."""
+        self._successes = 0
+        if ticket <= self._window_end:
+            return
+        self.limit = max(self.minimum, self.limit // 2)
+        self._window_end = self._started + self.limit
+
+
+async def _fetch_one(session, limiter, url, stats, max_retries, backoff_base, backoff_cap):
+    if cassette.replaying():
+        stats["requests"] += 1
+        hit = cassette.lookup("GET", url)
+        if hit is None or hit[0] != 200:
+            return None
+        stats["bytes"] += len(hit[2])
+        return json.loads(hit[2])["game"]
+
+    for attempt in range(max_retries + 1):
+        retry_after = None
+        async with limiter as ticket:
+            stats["requests"] += 1
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        body = await resp.read()
+                        stats["bytes"] += len(body)
+                        game = json.loads(body)["game"]
+                        if cassette.recording():
+                            cassette.record("GET", url, resp.status, resp.headers, body)
+                        limiter.on_success()
+                        return game
+                    if resp.status not in RETRY_STATUSES:
+                        return None
+                    limiter.on_throttle(ticket)
+                    stats["throttled"] += 1
+                    retry_after = resp.headers.get("Retry-After")
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                limiter.on_throttle(ticket)
+            except (ValueError, KeyError, TypeError):
+                stats["bad_bodies"] += 1
+
+        if attempt == max_retries:
+            break
+        stats["retries"] += 1
+        delay = random.uniform(0, min(backoff_cap, backoff_base * 2 ** attempt))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        await asyncio.sleep(delay)
+    return None
+
+
+async def fetch_boxscores_async(game_ids, url_template=None, initial_concurrency=8,
+                                max_concurrency=64, max_retries=4, timeout=15,
+                                backoff_base=0.5, backoff_cap=10.0):
+    """Fetch boxscores concurrently. Returns ({game_id: game or None}, stats)."""
+    url_template = url_template or BOXSCORE_URL
+    limiter = AdaptiveLimiter(initial=initial_concurrency, maximum=max_concurrency)
+    stats = {"requests": 0, "bytes": 0, "retries": 0, "throttled": 0, "bad_bodies": 0,
+             "failed": 0}
+    results = {}
+
+    connector = aiohttp.TCPConnector(limit=max_concurrency, ttl_dns_cache=300)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+    t0 = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async def run(game_id):
+            url = url_template.format(game_id=game_id)
+            return game_id, await _fetch_one(
+                session, limiter, url, stats, max_retries, backoff_base, backoff_cap,
+            )
+
+        tasks = [asyncio.create_task(run(gid)) for gid in game_ids]
+        for i, task in enumerate(asyncio.as_completed(tasks), 1):
+            game_id, game = await task
+            results[game_id] = game
+            if game is None:
+                stats["failed"] += 1
+            if i % 100 == 0:
+                print(f"    {i}/{len(game_ids)} boxscores fetched "
+                      f"(concurrency {limiter.limit})...")
+
+    elapsed = time.perf_counter() - t0
+    stats["elapsed"] = elapsed
+    stats["requests_per_sec"] = stats["requests"] / elapsed if elapsed > 0 else 0.0
+    stats["peak_concurrency"] = limiter.peak
+    stats["final_concurrency"] = limiter.limit
+    return results, stats
+
+
+def fetch_boxscores(game_ids, **kwargs):
+    """Blocking wrapper around fetch_boxscores_async()."""
+    return asyncio.run(fetch_boxscores_async(game_ids, **kwargs))
@@ -0,0 +1,100 @@
+"""
+Multi-season training corpus, partitioned by season.
+
+Each season's build_matchups() output is stored as compact arrays under
+corpus/<season>/: X.npy (float32 features), y.npy (int8 HOME_WIN),
+dates.npy (datetime64[D]) and meta.json (features, source digest, rows).
+Partitions are rebuilt only when their season's game logs change, and training
+reads them one at a time into a single preallocated float32 matrix. The full
+history is never held as a pandas frame.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+META_COLS = ['HOME_WIN', 'GAME_DATE', 'HOME_TEAM', 'AWAY_TEAM']
+
+
+class MatchupCorpus:
+    """Season-partitioned matchup feature store."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _dir(self, season):
+        return self.root / season
+
+    def meta(self, season):
+        path = self._dir(season) / "meta.json"
+        if not path.exists():
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def is_fresh(self, season, digest):
+        meta = self.meta(season)
+        return meta is not None and meta["digest"] == digest
+
+    def write(self, season, matchup_df, digest):
+        """Write one season's matchups. The partition is swapped in atomically."""
+        features = [c for c in matchup_df.columns if c not in META_COLS]
+        tmp_dir = self.root / f".{season}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        np.save(tmp_dir / "X.npy", matchup_df[features].to_numpy(dtype=np.float32))
+        np.save(tmp_dir / "y.npy", matchup_df['HOME_WIN'].to_numpy(dtype=np.int8))
+        np.save(tmp_dir / "dates.npy", matchup_df['GAME_DATE'].to_numpy().astype("datetime64[D]"))
+        with open(tmp_dir / "meta.json", "w") as f:
+            json.dump({"season": season, "features": features, "digest": digest,
+                       "n_rows": len(matchup_df)}, f, indent=2)
+
+        final_dir = self._dir(season)
+        old_dir = self.root / f".{season}.old"
+        if final_dir.exists():
+            os.replace(final_dir, old_dir)
+        os.replace(tmp_dir, final_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return len(matchup_df)
+
+    def load(self, seasons, season_weights=None):
+        """Stack partitions in season order.
+
+        Returns (features, X float32, y int8, weights float32); each season's rows
+        get its weight from `season_weights` (default 1.0). Seasons without a
+        partition are skipped.
+        """
+        season_weights = season_weights or {}
+        metas = self._partitions(seasons)
+        if not metas:
+            return [], np.empty((0, 0), np.float32), np.empty(0, np.int8), np.empty(0, np.float32)
+        features = metas[-1]["features"]
+        n_rows = sum(m["n_rows"] for m in metas)
+
+        X = np.empty((n_rows, len(features)), dtype=np.float32)
+        y = np.empty(n_rows, dtype=np.int8)
+        w = np.empty(n_rows, dtype=np.float32)
+        offset = 0
+        for m in metas:
+            if m["features"] != features:
+                raise ValueError(f"Corpus partition {m['season']} has stale features; rebuild it")
+            part = self._dir(m["season"])
+            end = offset + m["n_rows"]
+            X[offset:end] = np.load(part / "X.npy", mmap_mode="r")
+            y[offset:end] = np.load(part / "y.npy", mmap_mode="r")
+            w[offset:end] = season_weights.get(m["season"], 1.0)
+            offset = end
+        return features, X, y, w
+
+    def dates(self, seasons):
+        """GAME_DATE (datetime64[D]) for the rows load() returns, in the same order."""
+        metas = self._partitions(seasons)
+        if not metas:
+            return np.empty(0, "datetime64[D]")
+        return np.concatenate([np.load(self._dir(m["season"]) / "dates.npy") for m in metas])
+
+    def _partitions(self, seasons):
+        return [m for m in (self.meta(s) for s in seasons) if m and m["n_rows"]]
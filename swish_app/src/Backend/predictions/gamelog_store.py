@@ -0,0 +1,136 @@
+"""
+Persistent SQLite store of team game logs.
+
+One row per (GAME_ID, TEAM_ID). fetch_team_game_logs() only pulls games newer
+than the last stored GAME_DATE (minus a short reconcile window) and upserts
+them, so a run's network cost no longer grows with the length of the season.
+
+The current and past-season fetches run on separate prefetch threads, each
+with its own connection. Upserts within a process are serialized by a lock,
+and every connection waits up to BUSY_TIMEOUT for another process's write.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from pathlib import Path
+
+import pandas as pd
+
+COLUMNS = {
+    "SEASON": "TEXT NOT NULL",
+    "GAME_ID": "TEXT NOT NULL",
+    "TEAM_ID": "INTEGER NOT NULL",
+    "TEAM_NAME": "TEXT",
+    "GAME_DATE": "TEXT NOT NULL",  # ISO YYYY-MM-DD
+    "MATCHUP": "TEXT",
+    "WL": "TEXT",
+    "PTS": "INTEGER",
+    "AST": "INTEGER",
+    "REB": "INTEGER",
+    "FG_PCT": "REAL",
+}
+KEY = ["GAME_ID", "TEAM_ID"]
+BUSY_TIMEOUT = 60  # seconds a connection waits on a locked database
+
+_write_lock = threading.Lock()
+DTYPES = {"TEAM_ID": "int64", "PTS": "int64", "AST": "int64", "REB": "int64", "FG_PCT": "float64"}
+
+
+class GameLogStore:
+    """Typed, season-indexed table of team game logs."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT)
+        cols = ", ".join(f"{name} {decl}" for name, decl in COLUMNS.items())
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS game_logs ({cols}, PRIMARY KEY (GAME_ID, TEAM_ID));
+            CREATE INDEX IF NOT EXISTS game_logs_season_date ON game_logs (SEASON, GAME_DATE);
+        """)
+
+    def last_game_date(self, season):
+        """Latest stored GAME_DATE for a season as a Timestamp, or None."""
+        row = self._conn.execute(
+            "SELECT MAX(GAME_DATE) FROM game_logs WHERE SEASON = ?", (season,)
+        ).fetchone()
+        return pd.Timestamp(row[0]) if row[0] else None
+
+    def digest(self, season):
+        """Hash of a season's stored rows; changes whenever a row is added or corrected."""
+        h = hashlib.sha1()
+        for row in self._conn.execute(
+            "SELECT * FROM game_logs WHERE SEASON = ? ORDER BY GAME_ID, TEAM_ID", (season,)
+        ):
+            h.update(repr(row).encode())
+        return h.hexdigest()
+
+    def upsert(self, season, df):
+        """Insert new rows and overwrite rows that changed upstream.
+
+        Returns (inserted, corrected) row counts.
+        """
+        if df is None or df.empty:
+            return 0, 0
+        # Read-compare-write as one unit, so another thread's upsert can't
+        # land between the comparison and the write
+        with _write_lock:
+            return self._upsert(season, df)
+
+    def _upsert(self, season, df):
+        incoming = df.copy()
+        incoming["SEASON"] = season
+        incoming["GAME_ID"] = incoming["GAME_ID"].astype(str)
+        incoming["GAME_DATE"] = _to_iso_date(incoming["GAME_DATE"])
+        incoming = incoming[list(COLUMNS)].astype(DTYPES)
+
+        existing = self._load_keys(incoming["GAME_ID"].unique().tolist())
+        merged = incoming.merge(existing, on=KEY, how="left", suffixes=("", "_old"), indicator=True)
+        is_new = merged["_merge"] == "left_only"
+        value_cols = [c for c in COLUMNS if c not in KEY and c != "SEASON"]
+        changed = pd.Series(False, index=merged.index)
+        for col in value_cols:
+            changed |= merged[col].ne(merged[f"{col}_old"])
+        changed &= ~is_new
+
+        to_write = incoming[(is_new | changed).values]
+        if not to_write.empty:
+            placeholders = ", ".join("?" for _ in COLUMNS)
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT OR REPLACE INTO game_logs ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                    to_write.itertuples(index=False, name=None),
+                )
+        return int(is_new.sum()), int(changed.sum())
+
+    def load(self, season):
+        """Load a season's game logs with GAME_DATE as datetime64."""
+        df = pd.read_sql_query(
+            "SELECT * FROM game_logs WHERE SEASON = ? ORDER BY GAME_DATE, GAME_ID, TEAM_ID",
+            self._conn, params=(season,),
+        ).astype(DTYPES)
+        df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], format="%Y-%m-%d")
+        return df
+
+    def _load_keys(self, game_ids):
+        # Chunk the IN list to stay under SQLite's bound-parameter limit
+        chunks = [
+            pd.read_sql_query(
+                f"SELECT * FROM game_logs WHERE GAME_ID IN ({', '.join('?' * len(batch))})",
+                self._conn, params=batch,
+            )
+            for batch in (game_ids[i:i + 500] for i in range(0, len(game_ids), 500))
+        ]
+        existing = pd.concat(chunks) if chunks else pd.DataFrame(columns=list(COLUMNS))
+        return existing.drop(columns="SEASON").astype(DTYPES)
+
+    def close(self):
+        self._conn.close()
+
+
+def _to_iso_date(dates):
+    """Normalize datetimes or 'Oct 22, 2025' / '2025-10-22' strings to ISO."""
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, format="mixed")
+    return dates.dt.strftime("%Y-%m-%d")
@@ -4,33 +4,81 @@ Standalone script converted from Google Colab notebook.
 Fetches team game logs, builds features, trains XGBoost model,
 scrapes injuries, and outputs predictions.json for today's games.
 
-Usage: python generate.py
+Usage: python generate.py [--full-retrain] [--predict-only] [--history N] [--force STAGE]
 Output: ../data/predictions.json
 """
 
-import json
+import itertools
+from array import array
+import argparse
+import hashlib
+import multiprocessing
+import os
+import sys
 import time
-import re
-import unicodedata
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from datetime import datetime, timedelta
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import requests
-from bs4 import BeautifulSoup
-from nba_api.stats.endpoints import (
-    leaguedashplayerstats,
-    leaguegamelog,
-)
-from nba_api.stats.static import teams as nba_teams_static
-from sklearn.metrics import accuracy_score
-from xgboost import XGBClassifier
+
+import backend_path
+import cassette  # before metrics, so replayed requests are still counted
+import jsonfile
+import metrics
+from core import get_current_season, lazy_import, name_by_id, season_range
+
+# Only some runs fetch, scrape or train, so these load on first use
+bs4 = lazy_import("bs4")
+leaguedashplayerstats = lazy_import("nba_api.stats.endpoints.leaguedashplayerstats")
+leaguegamelog = lazy_import("nba_api.stats.endpoints.leaguegamelog")
+sklearn_metrics = lazy_import("sklearn.metrics")
+xgboost = lazy_import("xgboost")
+
+from boxscore_archive import BoxscoreArchive
+from boxscore_fetcher import fetch_boxscores
+from pipeline import Pipeline
+from corpus import MatchupCorpus
+import model_store
+from gamelog_store import GameLogStore
+from player_index import PlayerIndex
+from team_state import TeamState
 
 # ── Constants ──
 
 OUTPUT_PATH = Path(__file__).parents[3] / "public" / "data" / "predict.json"
+METRICS_PATH = OUTPUT_PATH.with_name("predict.metrics.json")
+CACHE_DIR = Path(__file__).parent / "cache"
+BOXSCORE_ARCHIVE_PATH = CACHE_DIR / "boxscores"
+GAMELOG_STORE_PATH = CACHE_DIR / "game_logs.sqlite"
+TEAM_STATE_PATH = CACHE_DIR / "team_state.json"
+MODEL_DIR = CACHE_DIR / "model"
+CORPUS_DIR = CACHE_DIR / "corpus"
+STAGE_CACHE_DIR = CACHE_DIR / "stages"
+
+# Defaults; tune.py writes better ones to MODEL_DIR/params.json, applied in main()
+XGB_PARAMS = {
+    'eval_metric': 'logloss',
+    'n_estimators': 200,
+    'max_depth': 4,
+    'learning_rate': 0.05,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+}
+# Trees added per warm start; a full retrain resets the model every FULL_RETRAIN_DAYS
+WARM_START_ROUNDS = 20
+FULL_RETRAIN_DAYS = 7
+
+# Completed seasons trained on alongside the current one. Each season back gets
+# SEASON_DECAY times the sample weight of the season after it.
+HISTORY_SEASONS = 3
+SEASON_DECAY = 0.5
+
+# Days re-fetched before the last stored game date to pick up stat corrections
+RECONCILE_DAYS = 3
 
 ABBR_TO_NAME = {
     "ATL": "Atlanta Hawks", "BOS": "Boston Celtics", "BKN": "Brooklyn Nets",
@@ -64,20 +112,6 @@ STATUS_WEIGHTS = {
 }
 
 
-def get_current_season():
-    """Get the NBA season string (e.g. '2025-26')."""
-    now = datetime.now()
-    if now.month >= 10:
-        return f"{now.year}-{str(now.year + 1)[-2:]}"
-    return f"{now.year - 1}-{str(now.year)[-2:]}"
-
-
-def normalize_name(name):
-    """Strip accents and lowercase for matching."""
-    nfkd = unicodedata.normalize('NFKD', name)
-    return ''.join(c for c in nfkd if not unicodedata.combining(c)).lower().strip()
-
-
 def convert_for_json(obj):
     """Convert numpy types to Python native types for JSON serialization."""
     if isinstance(obj, (np.float32, np.float64)):
@@ -93,156 +127,251 @@ def convert_for_json(obj):
 # STEP 1: Fetch all team game logs
 # ══════════════════════════════════════════════════════════
 
-# Cache player stats extracted from CDN boxscores (populated by _fetch_via_cdn)
+# PlayerIndex over player stats extracted from CDN boxscores (populated by _fetch_via_cdn)
 _cdn_player_cache = None
 
 
-def _fetch_boxscore(game_id):
-    """Fetch a single boxscore from NBA CDN. Returns (game_id, data) or (game_id, None)."""
-    url = f"https://cdn.nba.com/static/json/liveData/boxscore/boxscore_{game_id}.json"
-    try:
-        resp = requests.get(url, timeout=15)
-        resp.raise_for_status()
-        return game_id, resp.json()["game"]
-    except Exception:
-        return game_id, None
+def _fetch_via_cdn(season, since=None):
+    """Fallback: build game logs from NBA CDN schedule + boxscores.
 
+    Team rows are only built for games on or after `since` (ISO date) when given;
+    player averages always cover the full season.
+    """
+    archive = BoxscoreArchive(BOXSCORE_ARCHIVE_PATH)
 
-def _fetch_via_cdn():
-    """Fallback: build game logs from NBA CDN schedule + boxscores."""
     print("  Fetching season schedule from CDN...")
-    resp = requests.get(
-        "https://cdn.nba.com/static/json/staticData/scheduleLeagueV2.json",
-        timeout=30,
-    )
-    resp.raise_for_status()
-    schedule = resp.json()["leagueSchedule"]
-
-    # Collect completed regular-season game IDs (prefix '002')
-    game_ids = []
-    for d in schedule["gameDates"]:
-        for g in d.get("games", []):
-            if g.get("gameStatus") == 3 and g["gameId"].startswith("002"):
-                game_ids.append(g["gameId"])
-
-    print(f"  Found {len(game_ids)} completed regular-season games")
-    print("  Fetching boxscores (parallel)...")
-
-    # Build team-name lookup
-    all_nba_teams = nba_teams_static.get_teams()
-    tricode_to_name = {t["abbreviation"]: t["full_name"] for t in all_nba_teams}
-
-    # Parallel fetch boxscores
-    rows = []
-    player_accum = {}  # {(personId, teamTricode): {name, pts, reb, ast, games}}
+    try:
+        resp = requests.get(
+            "https://cdn.nba.com/static/json/staticData/scheduleLeagueV2.json",
+            timeout=30,
+        )
+        resp.raise_for_status()
+        schedule = resp.json()["leagueSchedule"]
+
+        # Collect completed regular-season game IDs (prefix '002')
+        game_ids = []
+        for d in schedule["gameDates"]:
+            for g in d.get("games", []):
+                if g.get("gameStatus") == 3 and g["gameId"].startswith("002"):
+                    game_ids.append(g["gameId"])
+    except requests.RequestException as e:
+        # Regular-season IDs look like 0022500123 for the 2025-26 season
+        prefix = f"002{season[2:4]}"
+        game_ids = [gid for gid in archive.game_ids() if gid.startswith(prefix)]
+        if not game_ids:
+            raise
+        print(f"  Schedule unavailable ({e}), using archived boxscores only")
+
+    missing = [gid for gid in game_ids if gid not in archive]
+    metrics.count("cache_hits", len(game_ids) - len(missing))
+    metrics.count("cache_misses", len(missing))
+    print(f"  Found {len(game_ids)} completed regular-season games "
+          f"({len(game_ids) - len(missing)} archived, {len(missing)} to fetch)")
+
+    # Concurrently fetch boxscores missing from the archive
+    fetched = {}
     failed = 0
-    with ThreadPoolExecutor(max_workers=20) as pool:
-        futures = {pool.submit(_fetch_boxscore, gid): gid for gid in game_ids}
-        for i, future in enumerate(as_completed(futures), 1):
-            game_id, game_data = future.result()
+    if missing:
+        print("  Fetching boxscores (async, pooled)...")
+        results, stats = fetch_boxscores(missing)
+        for game_id, game_data in results.items():
             if game_data is None:
                 failed += 1
-                continue
-
-            game_date = game_data.get("gameTimeUTC", "")[:10]  # YYYY-MM-DD
-
-            for side in ("homeTeam", "awayTeam"):
-                team = game_data[side]
-                opp_side = "awayTeam" if side == "homeTeam" else "homeTeam"
-                opp = game_data[opp_side]
+            # Only final boxscores are immutable and safe to archive
+            elif game_data.get("gameStatus") == 3:
+                archive.put(game_id, game_data)
+            else:
+                fetched[game_id] = game_data
+        archive.flush()
+        metrics.count("http_requests", stats['requests'])
+        metrics.count("http_bytes", stats['bytes'])
+        metrics.count("retries", stats['retries'])
+        print(f"  {stats['requests']} requests in {stats['elapsed']:.1f}s "
+              f"({stats['requests_per_sec']:.1f} req/s, {stats['retries']} retries, "
+              f"peak concurrency {stats['peak_concurrency']})")
+
+    # Parse straight into preallocated typed columns (two team rows per game)
+    n_games = len(game_ids) + len(fetched)
+    team_cols = {
+        "GAME_ID": np.empty(2 * n_games, dtype="U10"),
+        "TEAM_ID": np.empty(2 * n_games, dtype=np.int64),
+        "OPP_TEAM_ID": np.empty(2 * n_games, dtype=np.int64),
+        "GAME_DATE": np.empty(2 * n_games, dtype="datetime64[D]"),
+        "HOME": np.empty(2 * n_games, dtype=bool),
+        "PTS": np.empty(2 * n_games, dtype=np.int64),
+        "OPP_PTS": np.empty(2 * n_games, dtype=np.int64),
+        "AST": np.empty(2 * n_games, dtype=np.int64),
+        "REB": np.empty(2 * n_games, dtype=np.int64),
+        "FG_PCT": np.empty(2 * n_games, dtype=np.float64),
+    }
+    # Player appearances grow unpredictably, so use typed append-only buffers
+    player_cols = {k: array("q") for k in ("PLAYER_ID", "TEAM_ID", "PTS", "REB", "AST")}
+    player_names = {}
+    team_tricodes = {}
+
+    n = 0
+    boxscores = itertools.chain(archive.get_many(game_ids), fetched.items())
+    for game_id, game_data in boxscores:
+        game_date = game_data.get("gameTimeUTC", "")[:10]  # YYYY-MM-DD
+        emit_rows = since is None or game_date >= since
+
+        for side, opp_side in (("homeTeam", "awayTeam"), ("awayTeam", "homeTeam")):
+            team = game_data[side]
+            opp = game_data[opp_side]
+            team_id = team.get("teamId", 0)
+            team_tricodes.setdefault(team_id, team["teamTricode"])
+
+            if emit_rows:
                 stats = team.get("statistics", {})
+                team_cols["GAME_ID"][n] = game_id
+                team_cols["TEAM_ID"][n] = team_id
+                team_cols["OPP_TEAM_ID"][n] = opp.get("teamId", 0)
+                team_cols["GAME_DATE"][n] = game_date
+                team_cols["HOME"][n] = side == "homeTeam"
+                team_cols["PTS"][n] = team["score"]
+                team_cols["OPP_PTS"][n] = opp["score"]
+                team_cols["AST"][n] = stats.get("assists", 0)
+                team_cols["REB"][n] = stats.get("reboundsTotal", 0)
+                team_cols["FG_PCT"][n] = stats.get("fieldGoalsPercentage", 0.0)
+                n += 1
+
+            # Accumulate player appearances for importance calculation
+            for p in team.get("players", []):
+                ps = p.get("statistics", {})
+                if not ps or ps.get("minutes", "PT00M00.00S") == "PT00M00.00S":
+                    continue
+                pid = p.get("personId", 0)
+                if pid not in player_names:
+                    player_names[pid] = f"{p.get('firstName', '')} {p.get('familyName', '')}".strip()
+                player_cols["PLAYER_ID"].append(pid)
+                player_cols["TEAM_ID"].append(team_id)
+                player_cols["PTS"].append(ps.get("points", 0))
+                player_cols["REB"].append(ps.get("reboundsTotal", 0))
+                player_cols["AST"].append(ps.get("assists", 0))
 
-                tri = team["teamTricode"]
-                opp_tri = opp["teamTricode"]
-                is_home = side == "homeTeam"
-
-                matchup = f"{tri} vs. {opp_tri}" if is_home else f"{tri} @ {opp_tri}"
-
-                rows.append({
-                    "TEAM_ID": team.get("teamId", 0),
-                    "TEAM_NAME": tricode_to_name.get(tri, f"{team.get('teamCity', '')} {team.get('teamName', '')}"),
-                    "GAME_DATE": game_date,
-                    "MATCHUP": matchup,
-                    "WL": "W" if team["score"] > opp["score"] else "L",
-                    "PTS": team["score"],
-                    "AST": stats.get("assists", 0),
-                    "REB": stats.get("reboundsTotal", 0),
-                    "FG_PCT": stats.get("fieldGoalsPercentage", 0.0),
-                })
-
-                # Accumulate player stats for importance calculation
-                for p in team.get("players", []):
-                    ps = p.get("statistics", {})
-                    if not ps or ps.get("minutes", "PT00M00.00S") == "PT00M00.00S":
-                        continue
-                    pid = p.get("personId", 0)
-                    key = (pid, tri)
-                    if key not in player_accum:
-                        full_name = f"{p.get('firstName', '')} {p.get('familyName', '')}".strip()
-                        player_accum[key] = {"name": full_name, "team": tri, "pts": 0, "reb": 0, "ast": 0, "games": 0}
-                    player_accum[key]["pts"] += ps.get("points", 0)
-                    player_accum[key]["reb"] += ps.get("reboundsTotal", 0)
-                    player_accum[key]["ast"] += ps.get("assists", 0)
-                    player_accum[key]["games"] += 1
-
-            if i % 100 == 0:
-                print(f"    {i}/{len(game_ids)} boxscores fetched...")
+    team_id_to_name = name_by_id()
 
     # Build player per-game averages and cache them
     global _cdn_player_cache
-    if player_accum:
-        player_rows = []
-        for (pid, tri), acc in player_accum.items():
-            g = acc["games"]
-            if g == 0:
-                continue
-            player_rows.append({
-                "PLAYER_NAME": acc["name"],
-                "TEAM_FULL_NAME": tricode_to_name.get(tri, tri),
-                "PTS": acc["pts"] / g,
-                "REB": acc["reb"] / g,
-                "AST": acc["ast"] / g,
-                "IMPORTANCE": (acc["pts"] + acc["reb"] + acc["ast"]) / g,
-            })
-        pdf = pd.DataFrame(player_rows)
-        pdf["_norm"] = pdf["PLAYER_NAME"].apply(normalize_name)
-        _cdn_player_cache = pdf
+    if player_cols["PLAYER_ID"]:
+        appearances = pd.DataFrame({k: np.frombuffer(v, dtype=np.int64) for k, v in player_cols.items()})
+        grouped = appearances.groupby(["PLAYER_ID", "TEAM_ID"], sort=False)
+        totals = grouped.sum()
+        games = grouped.size()
+        pdf = totals.div(games, axis=0).reset_index()
+        pdf["IMPORTANCE"] = (totals["PTS"] + totals["REB"] + totals["AST"]).div(games).values
+        pdf["PLAYER_NAME"] = pdf["PLAYER_ID"].map(player_names)
+        pdf["TEAM_FULL_NAME"] = pdf["TEAM_ID"].map(team_id_to_name).fillna(pdf["TEAM_ID"].map(team_tricodes))
+        _cdn_player_cache = PlayerIndex(pdf)
         print(f"  Cached per-game stats for {len(pdf)} players from CDN")
 
-    print(f"  Fetched {len(game_ids) - failed}/{len(game_ids)} boxscores")
-    if not rows:
+    print(f"  Loaded {len(game_ids) - failed}/{len(game_ids)} boxscores")
+    if n == 0 and since is None:
         raise RuntimeError("No game data collected from CDN")
 
-    df = pd.DataFrame(rows)
-    # Convert date format to match nba_api output ("Oct 22, 2025")
-    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"]).dt.strftime("%b %d, %Y")
-    print(f"  Total rows: {len(df)} ({df['TEAM_NAME'].nunique()} teams)")
+    df = pd.DataFrame({k: v[:n] for k, v in team_cols.items()})
+    tricodes = pd.Series(team_tricodes, dtype=str)
+    tri = df["TEAM_ID"].map(tricodes)
+    opp_tri = df["OPP_TEAM_ID"].map(tricodes)
+    df["TEAM_NAME"] = df["TEAM_ID"].map(team_id_to_name)
+    df["MATCHUP"] = tri + np.where(df["HOME"], " vs. ", " @ ") + opp_tri
+    df["WL"] = np.where(df["PTS"] > df["OPP_PTS"], "W", "L")
+    df["GAME_DATE"] = df["GAME_DATE"].astype("datetime64[ns]")
+    df = df[["GAME_ID", "TEAM_ID", "TEAM_NAME", "GAME_DATE", "MATCHUP", "WL", "PTS", "AST", "REB", "FG_PCT"]]
+    print(f"  CDN rows: {len(df)} ({df['TEAM_NAME'].nunique()} teams)")
     return df
 
 
-def fetch_team_game_logs(season):
-    """Fetch game logs for all 30 NBA teams. Tries stats.nba.com first, falls back to CDN."""
-    all_nba_teams = nba_teams_static.get_teams()
-    team_id_to_name = {t['id']: t['full_name'] for t in all_nba_teams}
+def _fetch_league_game_log(season, since=None):
+    """Team game logs from stats.nba.com's bulk LeagueGameLog endpoint."""
+    team_id_to_name = name_by_id()
 
+    gamelog = leaguegamelog.LeagueGameLog(
+        season=season,
+        season_type_all_star='Regular Season',
+        player_or_team_abbreviation='T',
+        date_from_nullable=pd.Timestamp(since).strftime('%m/%d/%Y') if since else '',
+        timeout=30,
+    )
+    delta_df = gamelog.get_data_frames()[0]
+    delta_df['TEAM_NAME'] = delta_df['TEAM_ID'].map(team_id_to_name)
+    print(f"  Fetched {len(delta_df)} rows")
+    return delta_df
+
+
+def _fetch_game_log_delta(season, since):
+    """Fetch game logs on or after `since` (ISO date, None = whole season).
+
+    Tries stats.nba.com first, falls back to CDN.
+    """
     # Try bulk endpoint first (single request, works from datacenter IPs)
     try:
         print("  Trying bulk LeagueGameLog endpoint...")
-        gamelog = leaguegamelog.LeagueGameLog(
-            season=season,
-            season_type_all_star='Regular Season',
-            player_or_team_abbreviation='T',
-            timeout=30,
-        )
-        season_df = gamelog.get_data_frames()[0]
-        season_df['TEAM_NAME'] = season_df['TEAM_ID'].map(team_id_to_name)
-        print(f"  Total rows: {len(season_df)} ({season_df['TEAM_NAME'].nunique()} teams)")
-        return season_df
+        return _fetch_league_game_log(season, since)
     except Exception as e:
         print(f"  stats.nba.com unavailable: {e}")
         print("  Falling back to NBA CDN boxscores...")
 
-    return _fetch_via_cdn()
+    return _fetch_via_cdn(season, since=since)
+
+
+def fetch_team_game_logs(season):
+    """Fetch game logs for all 30 NBA teams.
+
+    Only games since the last stored GAME_DATE (minus RECONCILE_DAYS, to pick up
+    upstream stat corrections) are fetched; the season is then loaded from the
+    local game-log store.
+    """
+    store = GameLogStore(GAMELOG_STORE_PATH)
+    try:
+        last_date = store.last_game_date(season)
+        since = None
+        if last_date is not None:
+            since = (last_date - timedelta(days=RECONCILE_DAYS)).strftime('%Y-%m-%d')
+            print(f"  Stored through {last_date:%Y-%m-%d}, fetching games since {since}")
+
+        try:
+            delta_df = _fetch_game_log_delta(season, since)
+        except Exception as e:
+            if last_date is None:
+                raise
+            print(f"  Delta fetch failed ({e}), using stored game logs")
+            delta_df = None
+
+        inserted, corrected = store.upsert(season, delta_df)
+        print(f"  Stored {inserted} new rows, {corrected} corrected")
+
+        season_df = store.load(season)
+    finally:
+        store.close()
+
+    print(f"  Total rows: {len(season_df)} ({season_df['TEAM_NAME'].nunique()} teams)")
+    return season_df
+
+
+def fetch_past_seasons(seasons):
+    """Fetch completed seasons missing from the game-log store.
+
+    Returns {season: digest} for the completed seasons that are stored.
+    A completed season never changes, so each is fetched once. There is no CDN
+    fallback: the CDN schedule only covers the current season.
+    """
+    store = GameLogStore(GAMELOG_STORE_PATH)
+    try:
+        for season in seasons:
+            if store.last_game_date(season) is not None:
+                continue
+            print(f"  Fetching completed season {season}...")
+            try:
+                inserted, _ = store.upsert(season, _fetch_league_game_log(season))
+            except Exception as e:
+                print(f"  Could not fetch {season}: {e}")
+                continue
+            print(f"  Stored {inserted} rows for {season}")
+        stored = {s: store.digest(s) for s in seasons if store.last_game_date(s) is not None}
+    finally:
+        store.close()
+    return stored
 
 
 # ══════════════════════════════════════════════════════════
@@ -253,38 +382,39 @@ def engineer_features(df):
     """Add rolling stats, streaks, venue percentages, rest days."""
     df['WIN'] = df['WL'].map({'W': 1, 'L': 0})
     df['HOME_GAME'] = df['MATCHUP'].str.contains("vs.").astype(int)
-    df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'], format='%b %d, %Y', errors='coerce')
+    if not pd.api.types.is_datetime64_any_dtype(df['GAME_DATE']):
+        df['GAME_DATE'] = pd.to_datetime(df['GAME_DATE'], format='%b %d, %Y', errors='coerce')
     df = df.sort_values(['TEAM_NAME', 'GAME_DATE']).reset_index(drop=True)
 
-    def get_situational_stats(group):
-        group = group.copy()
-        group['PTS_rolling_avg'] = group['PTS'].shift(1).rolling(window=3, min_periods=1).mean()
-        group['AST_rolling_avg'] = group['AST'].shift(1).rolling(window=3, min_periods=1).mean()
-        group['REB_rolling_avg'] = group['REB'].shift(1).rolling(window=3, min_periods=1).mean()
+    team = df['TEAM_NAME']
+    g = df.groupby('TEAM_NAME', sort=False)
 
-        wins = group['WIN']
-        streak_id = wins.ne(wins.shift()).cumsum()
-        group['WIN_STREAK'] = (group.groupby(streak_id).cumcount() + 1) * wins.replace(0, -1)
+    for col in ('PTS', 'AST', 'REB'):
+        prev = g[col].shift(1)
+        df[f'{col}_rolling_avg'] = (
+            prev.groupby(team, sort=False).rolling(window=3, min_periods=1).mean()
+            .reset_index(level=0, drop=True)
+        )
 
-        home_wins_cumsum = (group['WIN'] * group['HOME_GAME']).cumsum()
-        home_games_cumsum = group['HOME_GAME'].cumsum()
-        group['HOME_VENUE_PCT'] = (home_wins_cumsum / home_games_cumsum).where(home_games_cumsum > 0)
-        group['HOME_VENUE_PCT'] = group['HOME_VENUE_PCT'].ffill().fillna(0)
+    # A streak run restarts whenever the result or the team changes
+    wins = df['WIN']
+    run_id = (wins.ne(wins.shift()) | team.ne(team.shift())).cumsum()
+    df['WIN_STREAK'] = (df.groupby(run_id).cumcount() + 1) * wins.replace(0, -1)
 
-        road_game = 1 - group['HOME_GAME']
-        road_wins_cumsum = (group['WIN'] * road_game).cumsum()
-        road_games_cumsum = road_game.cumsum()
-        group['ROAD_VENUE_PCT'] = (road_wins_cumsum / road_games_cumsum).where(road_games_cumsum > 0)
-        group['ROAD_VENUE_PCT'] = group['ROAD_VENUE_PCT'].ffill().fillna(0)
+    # Venue win pct; 0 until a team's first home/road game
+    home_games_cumsum = g['HOME_GAME'].cumsum()
+    home_wins_cumsum = (df['WIN'] * df['HOME_GAME']).groupby(team, sort=False).cumsum()
+    df['HOME_VENUE_PCT'] = (home_wins_cumsum / home_games_cumsum).where(home_games_cumsum > 0).fillna(0)
 
-        group['DAYS_REST'] = (group['GAME_DATE'].diff().dt.days - 1).fillna(1)
-        return group
+    road_game = 1 - df['HOME_GAME']
+    road_games_cumsum = road_game.groupby(team, sort=False).cumsum()
+    road_wins_cumsum = (df['WIN'] * road_game).groupby(team, sort=False).cumsum()
+    df['ROAD_VENUE_PCT'] = (road_wins_cumsum / road_games_cumsum).where(road_games_cumsum > 0).fillna(0)
 
-    team_names = df['TEAM_NAME'].copy()
-    df = df.groupby('TEAM_NAME', group_keys=False).apply(
-        get_situational_stats, include_groups=False,
-    ).reset_index(drop=True)
-    df['TEAM_NAME'] = team_names.values
+    df['DAYS_REST'] = (g['GAME_DATE'].diff().dt.days - 1).fillna(1)
+
+    # Keep TEAM_NAME after the engineered columns, as the per-team apply used to
+    df['TEAM_NAME'] = df.pop('TEAM_NAME')
 
     # Extract opponent
     df['OPP_TEAM_ABBR'] = df['MATCHUP'].str.extract(r'(?:vs\. |@ )([A-Z]{3})')
@@ -294,33 +424,42 @@ def engineer_features(df):
 
 
 def build_pre_game_stats(df):
-    """Build pre-game (shifted) stats for prediction. Fully vectorized."""
-    df = df.sort_values(['TEAM_NAME', 'GAME_DATE']).reset_index(drop=True)
-    g = df.groupby('TEAM_NAME')
+    """Build pre-game (shifted) stats for prediction.
 
-    # Expanding / rolling stats per team (all vectorized via transform)
-    for col, new_col in [('PTS', 'PRE_PTS_avg'), ('AST', 'PRE_AST_avg'),
-                          ('REB', 'PRE_REB_avg'), ('FG_PCT', 'PRE_FG_PCT')]:
-        df[new_col] = g[col].transform(lambda x: x.expanding().mean().shift(1))
-
-    df['RECENT_WIN_PCT'] = g['WIN'].transform(
-        lambda x: x.shift(1).rolling(5, min_periods=1).mean()
-    )
-    df['PRE_WIN_STREAK'] = g['WIN_STREAK'].transform(lambda x: x.shift(1).fillna(0))
-    df['PRE_HOME_PCT'] = g['HOME_VENUE_PCT'].transform(lambda x: x.shift(1).fillna(0))
-    df['PRE_ROAD_PCT'] = g['ROAD_VENUE_PCT'].transform(lambda x: x.shift(1).fillna(0))
-    df['PRE_WIN_PCT'] = g['WIN'].transform(
-        lambda x: x.expanding().mean().shift(1).fillna(0)
+    Uses native grouped kernels only (cumsum/cumcount/shift/rolling), no
+    per-group Python callbacks. "Games before this one" means the running total
+    minus the current row, divided by cumcount.
+    """
+    df = df.sort_values(['TEAM_NAME', 'GAME_DATE']).reset_index(drop=True)
+    team = df['TEAM_NAME']
+    g = df.groupby('TEAM_NAME', sort=False)
+    games_before = g.cumcount()
+
+    # Expanding means of integer box-score stats: exact via cumsum arithmetic
+    for col, new_col in [('PTS', 'PRE_PTS_avg'), ('AST', 'PRE_AST_avg'), ('REB', 'PRE_REB_avg')]:
+        df[new_col] = (g[col].cumsum() - df[col]) / games_before
+
+    # FG_PCT is fractional; the grouped expanding kernel keeps pandas' compensated sum
+    df['PRE_FG_PCT'] = (
+        g['FG_PCT'].expanding().mean().reset_index(level=0, drop=True)
+        .groupby(team, sort=False).shift(1)
     )
-    df['DAYS_REST'] = g['GAME_DATE'].transform(
-        lambda x: (x.diff().dt.days - 1).fillna(1)
+
+    df['RECENT_WIN_PCT'] = (
+        g['WIN'].shift(1).groupby(team, sort=False).rolling(5, min_periods=1).mean()
+        .reset_index(level=0, drop=True)
     )
+    df['PRE_WIN_STREAK'] = g['WIN_STREAK'].shift(1).fillna(0)
+    df['PRE_HOME_PCT'] = g['HOME_VENUE_PCT'].shift(1).fillna(0)
+    df['PRE_ROAD_PCT'] = g['ROAD_VENUE_PCT'].shift(1).fillna(0)
+    df['PRE_WIN_PCT'] = ((g['WIN'].cumsum() - df['WIN']) / games_before).fillna(0)
+    df['DAYS_REST'] = (g['GAME_DATE'].diff().dt.days - 1).fillna(1)
     df['BACK_TO_BACK'] = (df['DAYS_REST'] == 0).astype(int)
 
-    # H2H stats — vectorized using cumcount/cumsum per (team, opponent) pair
-    h2h = df.groupby(['TEAM_NAME', 'OPP_TEAM_NAME'])
+    # H2H stats per (team, opponent) pair
+    h2h = df.groupby(['TEAM_NAME', 'OPP_TEAM_NAME'], sort=False)
     df['H2H_GAMES'] = h2h.cumcount()  # 0 for first meeting, 1 for second, etc.
-    df['H2H_WINS'] = h2h['WIN'].transform(lambda x: x.cumsum().shift(1).fillna(0))
+    df['H2H_WINS'] = (h2h['WIN'].cumsum() - df['WIN']).astype('float64')
 
     return df
 
@@ -330,7 +469,10 @@ def build_pre_game_stats(df):
 # ══════════════════════════════════════════════════════════
 
 def fetch_player_stats(season):
-    """Fetch per-game player stats for injury importance weighting."""
+    """Fetch per-game player stats for injury importance weighting, as a PlayerIndex.
+
+    Returns None if stats.nba.com is unavailable; see with_cdn_player_fallback().
+    """
     print("  Fetching player season averages...")
     try:
         player_stats = leaguedashplayerstats.LeagueDashPlayerStats(
@@ -341,22 +483,25 @@ def fetch_player_stats(season):
         )
         player_df = player_stats.get_data_frames()[0]
         player_df['IMPORTANCE'] = player_df['PTS'] + player_df['REB'] + player_df['AST']
-        player_df['_norm'] = player_df['PLAYER_NAME'].apply(normalize_name)
 
-        all_nba_teams = nba_teams_static.get_teams()
-        team_id_to_name = {t['id']: t['full_name'] for t in all_nba_teams}
+        team_id_to_name = name_by_id()
         player_df['TEAM_FULL_NAME'] = player_df['TEAM_ID'].map(team_id_to_name)
 
         print(f"  Loaded stats for {len(player_df)} players")
-        return player_df
+        return PlayerIndex(player_df)
     except Exception as e:
         print(f"  Could not fetch player stats from API: {e}")
-        if _cdn_player_cache is not None:
-            print(f"  Using CDN-derived player stats ({len(_cdn_player_cache)} players)")
-            return _cdn_player_cache
         return None
 
 
+def with_cdn_player_fallback(player_index):
+    """Fall back to player stats derived from CDN boxscores by the game-log fetch."""
+    if player_index is None and _cdn_player_cache is not None:
+        print(f"  Using CDN-derived player stats ({len(_cdn_player_cache)} players)")
+        return _cdn_player_cache
+    return player_index
+
+
 # ══════════════════════════════════════════════════════════
 # STEP 4: Scrape injuries
 # ══════════════════════════════════════════════════════════
@@ -389,7 +534,7 @@ def fetch_nba_injuries():
     try:
         res = requests.get(url, headers=headers, timeout=15)
         res.raise_for_status()
-        soup = BeautifulSoup(res.text, 'html.parser')
+        soup = bs4.BeautifulSoup(res.text, 'html.parser')
 
         injuries = []
         tables = soup.find_all('table', class_='TableBase-table')
@@ -451,8 +596,24 @@ def fetch_nba_injuries():
     return None
 
 
-def compute_injury_scores(injury_df, player_df):
-    """Compute per-team injury impact scores."""
+@lru_cache(maxsize=None)
+def resolve_injury_team(team_raw):
+    """Map a scraped team label to its full name via INJURY_TEAM_MAP (cached)."""
+    matched_team = INJURY_TEAM_MAP.get(team_raw)
+    if matched_team:
+        return matched_team
+    raw_lower = team_raw.lower()
+    for key, val in INJURY_TEAM_MAP.items():
+        if key.lower() in raw_lower or raw_lower in key.lower():
+            return val
+    return None
+
+
+def compute_injury_scores(injury_df, player_index):
+    """Compute per-team injury impact scores.
+
+    `player_index` is a PlayerIndex from fetch_player_stats() (or None).
+    """
     team_injury_scores = {name: 0.0 for name in ABBR_TO_NAME.values()}
     team_injury_details = {name: [] for name in ABBR_TO_NAME.values()}
 
@@ -460,38 +621,24 @@ def compute_injury_scores(injury_df, player_df):
         print("  No injury data available")
         return team_injury_scores, team_injury_details
 
-    for _, row in injury_df.iterrows():
-        team_raw = str(row.get('Team', '')).strip()
-        status = str(row.get('Status', '')).strip()
-        player_name = str(row.get('Player', '')).strip()
-
-        matched_team = INJURY_TEAM_MAP.get(team_raw)
-        if not matched_team:
-            for key, val in INJURY_TEAM_MAP.items():
-                if key.lower() in team_raw.lower() or team_raw.lower() in key.lower():
-                    matched_team = val
-                    break
-
+    avg_importance = 15.0
+    for team_raw, status, player_name in zip(
+        injury_df['Team'].astype(str).str.strip(),
+        injury_df['Status'].astype(str).str.strip(),
+        injury_df['Player'].astype(str).str.strip(),
+    ):
+        matched_team = resolve_injury_team(team_raw)
         if not matched_team or matched_team not in team_injury_scores:
             continue
 
         status_weight = STATUS_WEIGHTS.get(status, 0.3)
 
         importance = 15.0
-        if player_df is not None:
-            player_norm = normalize_name(player_name)
-            match = player_df[
-                (player_df['_norm'] == player_norm) &
-                (player_df['TEAM_FULL_NAME'] == matched_team)
-            ]
-            if match.empty:
-                last_name = player_norm.split()[-1] if player_norm else ''
-                team_players = player_df[player_df['TEAM_FULL_NAME'] == matched_team]
-                match = team_players[team_players['_norm'].str.contains(last_name, na=False)]
-            if not match.empty:
-                importance = match.iloc[0]['IMPORTANCE']
-
-        avg_importance = 15.0
+        if player_index is not None:
+            hit = player_index.importance(player_name, matched_team)
+            if hit is not None:
+                importance = hit
+
         normalised = importance / avg_importance
         score = status_weight * normalised
 
@@ -561,107 +708,256 @@ def build_matchups(df):
     return matchup_df
 
 
-def train_model(matchup_df):
-    """Train XGBoost on matchup data, return fitted model and accuracy."""
+def _build_season_partition(season, store_path, corpus_dir):
+    """Worker: engineer one stored season into its corpus partition."""
+    store = GameLogStore(store_path)
+    try:
+        season_df = store.load(season)
+        digest = store.digest(season)
+    finally:
+        store.close()
+    matchup_df = build_matchups(build_pre_game_stats(engineer_features(season_df)))
+    return season, MatchupCorpus(corpus_dir).write(season, matchup_df, digest)
+
+
+def update_corpus(seasons, workers=None):
+    """Rebuild corpus partitions of past seasons whose game logs changed.
+
+    Each stale season is engineered in its own worker process, so memory holds
+    one season per worker regardless of how much history is loaded.
+    """
+    store = GameLogStore(GAMELOG_STORE_PATH)
+    try:
+        digests = {season: store.digest(season) for season in seasons}
+    finally:
+        store.close()
+    corpus = MatchupCorpus(CORPUS_DIR)
+    stale = [season for season in seasons if not corpus.is_fresh(season, digests[season])]
+    if stale:
+        workers = min(len(stale), workers or os.cpu_count())
+        # spawn, not fork: network fetches may still be running on other threads
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            for season, n_rows in pool.map(_build_season_partition, stale,
+                                           itertools.repeat(GAMELOG_STORE_PATH),
+                                           itertools.repeat(CORPUS_DIR)):
+                print(f"  Rebuilt {season} partition ({n_rows} matchups)")
+    print(f"  {len(seasons) - len(stale)} of {len(seasons)} past-season partitions up to date")
+    return digests
+
+
+def load_training_set(seasons, matchup_df, season_decay=SEASON_DECAY, corpus_dir=CORPUS_DIR):
+    """Write the current season's partition and stack every season for training.
+
+    `seasons` is oldest first, ending with the current season, whose matchups
+    are `matchup_df`. Returns (features, X, y, sample weights) as numpy arrays.
+    """
+    corpus = MatchupCorpus(corpus_dir)
+    corpus.write(seasons[-1], matchup_df, digest=None)
+    weights = {season: season_decay ** (len(seasons) - 1 - i) for i, season in enumerate(seasons)}
+    features, X, y, w = corpus.load(seasons, weights)
+    print(f"  Training set: {len(y)} matchups from {len(seasons)} season(s), "
+          f"{X.nbytes / 1e6:.1f} MB")
+    return features, X, y, w
+
+
+def _as_frame(X, features):
+    # Column names travel with the model so warm starts and predictions can
+    # validate them; a single float32 block wraps without copying.
+    return pd.DataFrame(X, columns=features, copy=False)
+
+
+def _split_features(matchup_df):
     meta_cols = ['HOME_WIN', 'GAME_DATE', 'HOME_TEAM', 'AWAY_TEAM']
     features = [c for c in matchup_df.columns if c not in meta_cols]
+    return features, matchup_df[features], matchup_df['HOME_WIN']
 
-    X = matchup_df[features]
-    y = matchup_df['HOME_WIN']
 
+def train_model(features, X, y, w):
+    """Train XGBoost on the weighted training set, return fitted model and accuracy."""
+    X = _as_frame(X, features)
     split_idx = int(len(X) * 0.8)
     X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
-    y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
-
-    model = XGBClassifier(
-        use_label_encoder=False,
-        eval_metric='logloss',
-        n_estimators=200,
-        max_depth=4,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-    )
-    model.fit(X_train, y_train)
+    y_train, y_test = y[:split_idx], y[split_idx:]
+
+    model = xgboost.XGBClassifier(**XGB_PARAMS)
+    model.fit(X_train, y_train, sample_weight=w[:split_idx])
 
     preds = model.predict(X_test)
-    accuracy = accuracy_score(y_test, preds)
+    accuracy = sklearn_metrics.accuracy_score(y_test, preds)
     print(f"  Held-out accuracy: {accuracy:.2%}")
 
     # Retrain on full dataset for production predictions
-    model.fit(X, y)
-    return model, features, accuracy
+    model.fit(X, y, sample_weight=w)
+    return model, accuracy
+
+
+def load_or_train_model(features, X, y, w, seasons, full_retrain=False,
+                        full_retrain_days=FULL_RETRAIN_DAYS):
+    """Reuse, warm-start or fully retrain the model against the saved artifact.
+
+    - Training data fingerprint unchanged: reuse the saved model as-is.
+    - New games since the artifact: boost WARM_START_ROUNDS more trees from it.
+    - No artifact, changed features or seasons, `full_retrain`, or the last full
+      retrain is older than `full_retrain_days`: train from scratch.
+
+    Returns (model, features, accuracy, n_rows trained on).
+    """
+    data_fp = model_store.fingerprint(features, X, y, w, XGB_PARAMS)
+    now = datetime.now()
+
+    prev = model_store.load_latest(MODEL_DIR)
+    if prev is not None:
+        prev_model, prev_meta = prev
+        if prev_meta['fingerprint'] == data_fp:
+            print(f"  Training data unchanged, reusing model v{prev_meta['version']}")
+            return prev_model, features, prev_meta['accuracy'], prev_meta['n_rows']
+
+        last_full = datetime.fromisoformat(prev_meta['last_full_train'])
+        if (prev_meta['features'] != features or prev_meta['params'] != XGB_PARAMS
+                or prev_meta.get('seasons') != seasons):
+            print("  Features, parameters or seasons changed, full retrain")
+        elif full_retrain:
+            print("  Full retrain requested")
+        elif (now - last_full).days >= full_retrain_days:
+            print(f"  Last full retrain {last_full:%Y-%m-%d}, full retrain due")
+        else:
+            print(f"  {len(X) - prev_meta['n_rows']} new matchups, "
+                  f"warm-starting from model v{prev_meta['version']}")
+            model = xgboost.XGBClassifier(**{**XGB_PARAMS, 'n_estimators': WARM_START_ROUNDS})
+            model.fit(_as_frame(X, features), y, sample_weight=w, xgb_model=prev_model.get_booster())
+            accuracy = prev_meta['accuracy']
+            version = model_store.save(MODEL_DIR, model, {
+                **prev_meta,
+                'fingerprint': data_fp,
+                'n_rows': len(X),
+                'trained_at': now.isoformat(),
+                'mode': 'warm',
+                'n_trees': model.get_booster().num_boosted_rounds(),
+            })
+            print(f"  Saved model v{version} ({accuracy:.2%} held-out at last full retrain)")
+            return model, features, accuracy, len(X)
+
+    model, accuracy = train_model(features, X, y, w)
+    version = model_store.save(MODEL_DIR, model, {
+        'features': features,
+        'params': XGB_PARAMS,
+        'seasons': seasons,
+        'accuracy': accuracy,
+        'fingerprint': data_fp,
+        'n_rows': len(X),
+        'trained_at': now.isoformat(),
+        'last_full_train': now.isoformat(),
+        'mode': 'full',
+        'n_trees': model.get_booster().num_boosted_rounds(),
+    })
+    print(f"  Saved model v{version}")
+    return model, features, accuracy, len(X)
+
+
+def apply_tuned_params():
+    """Merge tuned hyperparameters from tune.py into XGB_PARAMS, if any."""
+    tuned = model_store.load_params(MODEL_DIR)
+    if tuned:
+        XGB_PARAMS.update(tuned)
+        print(f"  Using tuned parameters: {tuned}")
+
+
+def load_saved_model():
+    """Return (model, features, accuracy, n_rows) from the latest artifact, or None."""
+    prev = model_store.load_latest(MODEL_DIR)
+    if prev is None:
+        return None
+    model, meta = prev
+    print(f"  Loaded model v{meta['version']} (trained {meta['trained_at'][:16]})")
+    return model, meta['features'], meta['accuracy'], meta['n_rows']
 
 
 # ══════════════════════════════════════════════════════════
 # STEP 6: Predict today's games
 # ══════════════════════════════════════════════════════════
 
-def predict_todays_games(model, features, df, team_injury_scores, team_injury_details):
-    """Fetch today's schedule and generate predictions."""
-    latest = df.sort_values('GAME_DATE').groupby('TEAM_NAME').last().reset_index()
-
-    def predict_game(home_name, away_name, home_rest=1, away_rest=1):
-        h = latest[latest['TEAM_NAME'] == home_name]
-        a = latest[latest['TEAM_NAME'] == away_name]
-        if h.empty or a.empty:
-            return None
-        h, a = h.iloc[0], a.iloc[0]
-
-        h2h = df[(df['TEAM_NAME'] == home_name) & (df['OPP_TEAM_NAME'] == away_name)]
-        h2h_wins = h2h['WIN'].sum() if len(h2h) > 0 else 0
-        h2h_games = len(h2h)
-
-        input_row = pd.DataFrame([{
-            'HOME_PTS_avg': h['PRE_PTS_avg'],
-            'HOME_AST_avg': h['PRE_AST_avg'],
-            'HOME_REB_avg': h['PRE_REB_avg'],
-            'HOME_FG_PCT': h['PRE_FG_PCT'],
-            'HOME_RECENT_WIN_PCT': h['RECENT_WIN_PCT'],
-            'HOME_WIN_STREAK': h['PRE_WIN_STREAK'],
-            'HOME_VENUE_PCT': h['PRE_HOME_PCT'],
-            'HOME_OVERALL_PCT': h['PRE_WIN_PCT'],
-            'HOME_DAYS_REST': home_rest,
-            'HOME_B2B': 1 if home_rest == 0 else 0,
-            'HOME_H2H_WINS': h2h_wins,
-            'HOME_H2H_GAMES': h2h_games,
-            'AWAY_PTS_avg': a['PRE_PTS_avg'],
-            'AWAY_AST_avg': a['PRE_AST_avg'],
-            'AWAY_REB_avg': a['PRE_REB_avg'],
-            'AWAY_FG_PCT': a['PRE_FG_PCT'],
-            'AWAY_RECENT_WIN_PCT': a['RECENT_WIN_PCT'],
-            'AWAY_WIN_STREAK': a['PRE_WIN_STREAK'],
-            'AWAY_VENUE_PCT': a['PRE_ROAD_PCT'],
-            'AWAY_OVERALL_PCT': a['PRE_WIN_PCT'],
-            'AWAY_DAYS_REST': away_rest,
-            'AWAY_B2B': 1 if away_rest == 0 else 0,
-            'REST_DIFF': home_rest - away_rest,
-            'WIN_PCT_DIFF': h['PRE_WIN_PCT'] - a['PRE_WIN_PCT'],
-            'PTS_DIFF': h['PRE_PTS_avg'] - a['PRE_PTS_avg'],
-        }])
-
-        raw_prob = model.predict_proba(input_row)[0][1]
-        home_inj = team_injury_scores.get(home_name, 0)
-        away_inj = team_injury_scores.get(away_name, 0)
-        injury_adjustment = (away_inj - home_inj) * 0.02
-        adj_prob = max(0.05, min(0.95, raw_prob + injury_adjustment))
-
-        return {
-            'prob': adj_prob,
-            'raw_prob': raw_prob,
-            'home_inj': home_inj,
-            'away_inj': away_inj,
-            'adjustment': injury_adjustment,
-        }
-
-    # Fetch today's schedule from NBA live scoreboard
+def update_team_state(df, season):
+    """Fold games not yet seen into the persisted per-team feature state."""
+    state = TeamState.load(TEAM_STATE_PATH, season)
+    new_rows = state.pending(df)
+    if new_rows is None:
+        print("  Feature state out of sync with game logs, rebuilding")
+        state = TeamState(season)
+        new_rows = df
+    corrected = state.corrected(df)
+    if corrected:
+        print(f"  Refolding {len(corrected)} team(s) with corrected games: {', '.join(corrected)}")
+        state.refold(df, corrected)
+    state.apply(new_rows)
+    state.save(TEAM_STATE_PATH)
+    print(f"  Feature state: {len(new_rows)} new team-games applied "
+          f"(through {state.through_date})")
+    return state
+
+
+def build_slate_features(team_state, games):
+    """Build one model-feature row per game from the team state.
+
+    Returns (X, mask): X has a row for each game where both teams have
+    state, and mask marks those games within `games`.
+    """
+    pre = team_state.pre_game_frame()
+    homes = [g['home'] for g in games]
+    aways = [g['away'] for g in games]
+    mask = np.array([h in pre.index and a in pre.index for h, a in zip(homes, aways)], dtype=bool)
+    slate = [g for g, ok in zip(games, mask) if ok]
+    if not slate:
+        return pd.DataFrame(), mask
+
+    h = pre.loc[[g['home'] for g in slate]].reset_index(drop=True)
+    a = pre.loc[[g['away'] for g in slate]].reset_index(drop=True)
+    home_rest = pd.Series([g['home_rest'] for g in slate], dtype='int64')
+    away_rest = pd.Series([g['away_rest'] for g in slate], dtype='int64')
+    h2h = [team_state.head_to_head(g['home'], g['away']) for g in slate]
+
+    X = pd.DataFrame({
+        'HOME_PTS_avg': h['PRE_PTS_avg'],
+        'HOME_AST_avg': h['PRE_AST_avg'],
+        'HOME_REB_avg': h['PRE_REB_avg'],
+        'HOME_FG_PCT': h['PRE_FG_PCT'],
+        'HOME_RECENT_WIN_PCT': h['RECENT_WIN_PCT'],
+        'HOME_WIN_STREAK': h['PRE_WIN_STREAK'],
+        'HOME_VENUE_PCT': h['PRE_HOME_PCT'],
+        'HOME_OVERALL_PCT': h['PRE_WIN_PCT'],
+        'HOME_DAYS_REST': home_rest,
+        'HOME_B2B': (home_rest == 0).astype(int),
+        'HOME_H2H_WINS': pd.Series([w for w, _ in h2h], dtype='int64'),
+        'HOME_H2H_GAMES': pd.Series([n for _, n in h2h], dtype='int64'),
+        'AWAY_PTS_avg': a['PRE_PTS_avg'],
+        'AWAY_AST_avg': a['PRE_AST_avg'],
+        'AWAY_REB_avg': a['PRE_REB_avg'],
+        'AWAY_FG_PCT': a['PRE_FG_PCT'],
+        'AWAY_RECENT_WIN_PCT': a['RECENT_WIN_PCT'],
+        'AWAY_WIN_STREAK': a['PRE_WIN_STREAK'],
+        'AWAY_VENUE_PCT': a['PRE_ROAD_PCT'],
+        'AWAY_OVERALL_PCT': a['PRE_WIN_PCT'],
+        'AWAY_DAYS_REST': away_rest,
+        'AWAY_B2B': (away_rest == 0).astype(int),
+        'REST_DIFF': home_rest - away_rest,
+        'WIN_PCT_DIFF': h['PRE_WIN_PCT'] - a['PRE_WIN_PCT'],
+        'PTS_DIFF': h['PRE_PTS_avg'] - a['PRE_PTS_avg'],
+    })
+    return X, mask
+
+
+def fetch_scoreboard():
+    """Fetch today's NBA live scoreboard JSON."""
     print("  Fetching today's schedule...")
     scoreboard_url = "https://cdn.nba.com/static/json/liveData/scoreboard/todaysScoreboard_00.json"
     resp = requests.get(scoreboard_url, timeout=30)
     resp.raise_for_status()
-    games_data = resp.json()
+    return resp.json()
+
 
+def build_schedule(games_data, team_state):
+    """Today's games from the scoreboard, with rest days from the team state."""
     todays_games = []
+    today = pd.Timestamp.now().normalize()
     if 'scoreboard' in games_data and 'games' in games_data['scoreboard']:
         for game in games_data['scoreboard']['games']:
             home_name = f"{game['homeTeam']['teamCity']} {game['homeTeam']['teamName']}"
@@ -669,13 +965,9 @@ def predict_todays_games(model, features, df, team_injury_scores, team_injury_de
             home_name = TEAM_NAME_ALIASES.get(home_name, home_name)
             away_name = TEAM_NAME_ALIASES.get(away_name, away_name)
 
-            try:
-                home_last = df[df['TEAM_NAME'] == home_name].sort_values('GAME_DATE').iloc[-1]
-                away_last = df[df['TEAM_NAME'] == away_name].sort_values('GAME_DATE').iloc[-1]
-                today = pd.Timestamp.now().normalize()
-                home_rest = max((today - home_last['GAME_DATE']).days - 1, 0)
-                away_rest = max((today - away_last['GAME_DATE']).days - 1, 0)
-            except Exception:
+            home_rest = team_state.days_rest(home_name, today)
+            away_rest = team_state.days_rest(away_name, today)
+            if home_rest is None or away_rest is None:
                 home_rest = 1
                 away_rest = 1
 
@@ -688,15 +980,26 @@ def predict_todays_games(model, features, df, team_injury_scores, team_injury_de
             })
 
     print(f"  Found {len(todays_games)} games today")
+    return todays_games
 
-    # Generate predictions
-    predictions = []
-    for game in todays_games:
-        result = predict_game(game['home'], game['away'], game['home_rest'], game['away_rest'])
-        if result is None:
-            print(f"  Could not predict: {game['away']} @ {game['home']}")
-            continue
 
+def predict_slate(model, features, team_state, todays_games, team_injury_scores, team_injury_details):
+    """Predict a whole slate with a single predict_proba call. No network I/O."""
+    X, mask = build_slate_features(team_state, todays_games)
+    for game in (g for g, ok in zip(todays_games, mask) if not ok):
+        print(f"  Could not predict: {game['away']} @ {game['home']}")
+    slate = [g for g, ok in zip(todays_games, mask) if ok]
+    if not slate:
+        return []
+
+    raw_probs = model.predict_proba(X[features])[:, 1]
+    home_inj = np.array([team_injury_scores.get(g['home'], 0) for g in slate], dtype=float)
+    away_inj = np.array([team_injury_scores.get(g['away'], 0) for g in slate], dtype=float)
+    adjustments = (away_inj - home_inj) * 0.02
+    probs = np.clip(raw_probs + adjustments, 0.05, 0.95)
+
+    predictions = []
+    for i, game in enumerate(slate):
         home_abbr = game.get('home_abbr', NAME_TO_ABBR.get(game['home'], '???'))
         away_abbr = game.get('away_abbr', NAME_TO_ABBR.get(game['away'], '???'))
 
@@ -717,86 +1020,168 @@ def predict_todays_games(model, features, df, team_injury_scores, team_injury_de
             "away_team": game['away'],
             "home_abbr": home_abbr,
             "away_abbr": away_abbr,
-            "home_win_prob": round(result['prob'], 3),
-            "away_win_prob": round(1 - result['prob'], 3),
-            "raw_prob": round(result['raw_prob'], 3),
-            "injury_adjustment": round(result['adjustment'], 3),
-            "home_injury_score": round(result['home_inj'], 2),
-            "away_injury_score": round(result['away_inj'], 2),
+            "home_win_prob": round(float(probs[i]), 3),
+            "away_win_prob": round(1 - float(probs[i]), 3),
+            "raw_prob": round(float(raw_probs[i]), 3),
+            "injury_adjustment": round(float(adjustments[i]), 3),
+            "home_injury_score": round(float(home_inj[i]), 2),
+            "away_injury_score": round(float(away_inj[i]), 2),
             "home_rest": game['home_rest'],
             "away_rest": game['away_rest'],
             "status": game['status'],
             "injuries": game_injuries,
         })
 
-    return predictions, todays_games
+    return predictions
 
 
 # ══════════════════════════════════════════════════════════
 # MAIN
 # ══════════════════════════════════════════════════════════
 
-def main():
+STAGES = [
+    'past_game_logs', 'game_logs', 'player_stats_api', 'injuries', 'scoreboard',
+    'history', 'features', 'pregame', 'team_state', 'player_stats', 'injury_scores',
+    'matchups', 'training_set', 'model', 'schedule', 'predictions',
+]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate today's NBA game predictions.")
+    parser.add_argument('--full-retrain', action='store_true',
+                        help='train from scratch instead of warm-starting the saved model')
+    parser.add_argument('--full-retrain-days', type=int, default=FULL_RETRAIN_DAYS,
+                        help=f'days between scheduled full retrains (default {FULL_RETRAIN_DAYS})')
+    parser.add_argument('--predict-only', action='store_true',
+                        help='skip training and predict with the saved model')
+    parser.add_argument('--history', type=int, default=HISTORY_SEASONS,
+                        help=f'completed seasons to train on besides the current one (default {HISTORY_SEASONS})')
+    parser.add_argument('--season-decay', type=float, default=SEASON_DECAY,
+                        help=f'sample weight multiplier per season back (default {SEASON_DECAY})')
+    parser.add_argument('--force', action='append', default=[], choices=STAGES + ['all'],
+                        metavar='STAGE',
+                        help='rerun STAGE and everything downstream of it even if cached '
+                             f'(repeatable; one of {", ".join(STAGES)}, all)')
+    return parser.parse_args(argv)
+
+
+def _code_version():
+    """Hash of every loaded Backend module, so code changes invalidate cached stages.
+
+    Covers predictions/ as well as the shared modules (core/, jsonfile.py,
+    metrics.py, cassette.py, ...). Lazily imported third-party modules aren't
+    touched: only modules already in sys.modules are considered.
+    """
+    backend_dir = Path(__file__).resolve().parents[1]
+    paths = set()
+    for module in list(sys.modules.values()):
+        path = getattr(module, '__file__', None)
+        if path and path.endswith('.py') and Path(path).resolve().is_relative_to(backend_dir):
+            paths.add(Path(path).resolve())
+    h = hashlib.sha256()
+    for path in sorted(paths):
+        h.update(str(path.relative_to(backend_dir)).encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def build_pipeline(args, season, seasons):
+    """Wire the prediction steps into a cached stage DAG."""
+    force = list(args.force)
+    if args.full_retrain:
+        force.append('model')
+    p = Pipeline(STAGE_CACHE_DIR, code_version=_code_version(), force=force)
+
+    # Sources: network fetches with no inputs, all started at once by prefetch()
+    p.add('game_logs', lambda: fetch_team_game_logs(season), source=True)
+    p.add('player_stats_api', lambda: fetch_player_stats(season), source=True)
+    p.add('injuries', fetch_nba_injuries, source=True)
+    p.add('scoreboard', fetch_scoreboard, source=True)
+
+    # game_logs fills _cdn_player_cache when it falls back to the CDN
+    p.add('player_stats', lambda api, _: with_cdn_player_fallback(api),
+          deps=['player_stats_api', 'game_logs'])
+    p.add('schedule', build_schedule, deps=['scoreboard', 'team_state'])
+    p.add('features', engineer_features, deps=['game_logs'])
+    p.add('pregame', build_pre_game_stats, deps=['features'])
+    p.add('team_state', lambda df: update_team_state(df, season), deps=['pregame'])
+    p.add('injury_scores', compute_injury_scores, deps=['injuries', 'player_stats'])
+
+    if args.predict_only:
+        # No training stages at all, so no past-season fetch or corpus rebuild
+        def saved_model():
+            saved = load_saved_model()
+            if saved is None:
+                raise SystemExit(f"No saved model in {MODEL_DIR}; run without --predict-only first")
+            return saved
+
+        # A source, so a newly saved artifact is always picked up
+        p.add('model', saved_model, source=True)
+    else:
+        p.add('past_game_logs', lambda: fetch_past_seasons(seasons[:-1]), source=True)
+        p.add('history', lambda past: update_corpus(list(past)), deps=['past_game_logs'])
+        p.add('matchups', build_matchups, deps=['pregame'])
+        p.add(
+            'training_set',
+            lambda history, matchup_df: load_training_set(list(history) + [season], matchup_df,
+                                                          args.season_decay),
+            deps=['history', 'matchups'], params={'season_decay': args.season_decay},
+        )
+
+        def model_stage(history, training_set):
+            features, X, y, w = training_set
+            return load_or_train_model(
+                features, X, y, w, list(history) + [season], full_retrain=args.full_retrain,
+                full_retrain_days=args.full_retrain_days,
+            )
+
+        p.add('model', model_stage, deps=['history', 'training_set'], params={
+            'xgb': XGB_PARAMS, 'full_retrain_days': args.full_retrain_days,
+        })
+
+    def predictions_stage(model, team_state, todays_games, injury_scores):
+        model, features, _, _ = model
+        team_injury_scores, team_injury_details = injury_scores
+        return predict_slate(model, features, team_state, todays_games,
+                             team_injury_scores, team_injury_details)
+
+    p.add('predictions', predictions_stage,
+          deps=['model', 'team_state', 'schedule', 'injury_scores'])
+    return p
+
+
+def main(argv=None):
+    args = parse_args(argv)
     season = get_current_season()
+    seasons = season_range(season, args.history)
     print(f"{'=' * 60}")
     print(f"  NBA PREDICTION GENERATOR")
-    print(f"  Season: {season}")
+    print(f"  Season: {season} (training on {seasons[0]} to {seasons[-1]})")
     print(f"  Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"{'=' * 60}\n")
+    print(f"{'=' * 60}")
 
     t0 = time.time()
-
-    # Step 1: Fetch game logs
-    print("[1/6] Fetching team game logs...")
-    season_df = fetch_team_game_logs(season)
-    print(f"  [{time.time() - t0:.1f}s elapsed]")
-
-    # Step 2: Feature engineering
-    print("\n[2/6] Engineering features...")
-    df = engineer_features(season_df)
-    print(f"  [{time.time() - t0:.1f}s elapsed]")
-
-    # Step 3: Build pre-game stats
-    print("\n[3/6] Building pre-game stats...")
-    df = build_pre_game_stats(df)
-    print(f"  [{time.time() - t0:.1f}s elapsed]")
-
-    # Step 4: Fetch injuries & player stats
-    print("\n[4/6] Fetching injuries & player stats...")
-    player_df = fetch_player_stats(season)
-    time.sleep(1)
-    injury_df = fetch_nba_injuries()
-    team_injury_scores, team_injury_details = compute_injury_scores(injury_df, player_df)
-    print(f"  [{time.time() - t0:.1f}s elapsed]")
-
-    # Step 5: Train model
-    print("\n[5/6] Training model...")
-    matchup_df = build_matchups(df)
-    print(f"  Total matchups: {len(matchup_df)}")
-    model, features, accuracy = train_model(matchup_df)
-    print(f"  [{time.time() - t0:.1f}s elapsed]")
-
-    # Step 6: Predict today's games
-    print("\n[6/6] Predicting today's games...")
-    predictions, todays_games = predict_todays_games(
-        model, features, df, team_injury_scores, team_injury_details
-    )
-    print(f"  [{time.time() - t0:.1f}s elapsed]")
+    apply_tuned_params()
+    with build_pipeline(args, season, seasons) as pipeline:
+        pipeline.prefetch()
+        predictions = pipeline.resolve('predictions')
+        _, _, accuracy, n_rows = pipeline.get('model')
+        injury_df = pipeline.get('injuries')
+    print(f"\n  Ran {len(pipeline.ran)} stages, {len(pipeline.cached)} cached "
+          f"[{time.time() - t0:.1f}s elapsed]")
 
     # Build output
     output = {
         "date": datetime.now().strftime("%Y-%m-%d"),
         "generated_at": datetime.now().isoformat(),
         "model_accuracy": f"{accuracy:.2%}",
-        "total_matchups_trained": len(matchup_df),
+        "total_matchups_trained": n_rows,
         "has_injuries": injury_df is not None and len(injury_df) > 0,
         "games": predictions,
     }
 
     # Write to file
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(OUTPUT_PATH, 'w') as f:
-        json.dump(output, f, indent=2, default=convert_for_json)
+    jsonfile.write_json(OUTPUT_PATH, output, default=convert_for_json)
 
     print(f"\n{'=' * 60}")
     print(f"  DONE!")
@@ -820,3 +1205,6 @@ if __name__ == '__main__':
         import traceback
         traceback.print_exc()
         raise
+    finally:
+        metrics.write(METRICS_PATH, script="generate.py")
+        print(f"  Metrics: {METRICS_PATH}")
@@ -0,0 +1,97 @@
+"""
+Versioned on-disk model artifacts.
+
+Each training run writes model/v<N>/model.json (the XGBoost model) and
+model/v<N>/meta.json (features, accuracy, training-data fingerprint, ...).
+model/LATEST holds the current version number. Only the newest KEEP_VERSIONS
+versions are kept. model/params.json holds tuned hyperparameters (see tune.py)
+and is independent of the versions.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+
+import backend_path
+from core import lazy_import
+
+xgboost = lazy_import("xgboost")
+
+KEEP_VERSIONS = 5
+
+
+def fingerprint(features, X, y, w, params):
+    """Stable hash of the training matrix, labels, weights, feature names and model params."""
+    h = hashlib.sha256()
+    h.update(json.dumps([features, params], sort_keys=True, default=str).encode())
+    for arr in (X, y, w):
+        h.update(np.ascontiguousarray(arr).tobytes())
+    return h.hexdigest()
+
+
+def _versions(root):
+    return sorted(
+        int(p.name[1:]) for p in Path(root).glob("v*")
+        if p.is_dir() and p.name[1:].isdigit()
+    )
+
+
+def load_latest(root):
+    """Return (model, meta) for the current artifact, or None."""
+    root = Path(root)
+    latest = root / "LATEST"
+    if not latest.exists():
+        return None
+    version_dir = root / f"v{latest.read_text().strip()}"
+    try:
+        with open(version_dir / "meta.json", "r") as f:
+            meta = json.load(f)
+        model = xgboost.XGBClassifier()
+        model.load_model(version_dir / "model.json")
+    except (OSError, ValueError) as e:
+        print(f"  Could not load model artifact {version_dir.name}: {e}")
+        return None
+    return model, meta
+
+
+def save(root, model, meta):
+    """Write a new artifact version and point LATEST at it. Returns the version."""
+    root = Path(root)
+    versions = _versions(root)
+    version = versions[-1] + 1 if versions else 1
+    version_dir = root / f"v{version}"
+    version_dir.mkdir(parents=True)
+
+    model.save_model(version_dir / "model.json")
+    with open(version_dir / "meta.json", "w") as f:
+        json.dump({**meta, "version": version}, f, indent=2)
+
+    tmp_path = root / "LATEST.tmp"
+    tmp_path.write_text(str(version))
+    os.replace(tmp_path, root / "LATEST")
+
+    for old in versions[:-(KEEP_VERSIONS - 1) or None]:
+        shutil.rmtree(root / f"v{old}", ignore_errors=True)
+    return version
+
+
+def load_params(root):
+    """Tuned XGBoost parameters from params.json, or None."""
+    path = Path(root) / "params.json"
+    if not path.exists():
+        return None
+    with open(path, "r") as f:
+        return json.load(f)["params"]
+
+
+def save_params(root, params, meta):
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    tmp_path = root / "params.json.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"params": params, **meta}, f, indent=2)
+    os.replace(tmp_path, root / "params.json")
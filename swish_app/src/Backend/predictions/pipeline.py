@@ -0,0 +1,236 @@
+"""
+Cached stage DAG for generate.py.
+
+Each stage declares the stages it depends on. Derived stages are fingerprinted
+from their name, parameters, the code version and their inputs' fingerprints.
+Their output is pickled under stages/<name>/<fingerprint>.pkl and reused until
+that fingerprint changes. Source stages (network fetches) always run. They are
+fingerprinted by the content they return, so an unchanged fetch leaves
+everything downstream cached.
+
+Outputs are only loaded when something downstream actually needs them. If only
+the injury report changed, the model and team state are read back from disk
+and just the injury scores and predictions are recomputed.
+
+prefetch() starts every source without inputs on a thread pool. The fetches
+overlap each other and the compute stages. resolve() computes each stage as
+soon as the sources it depends on have arrived, so e.g. feature engineering on
+the current season runs while past seasons are still downloading. It only runs
+a stage early if that stage misses the cache. Every stage between a miss and the
+target misses too, so those stages would be computed anyway. A fetch's output
+is printed as one block when it finishes.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import backend_path
+import metrics
+
+
+def _hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class _ThreadBufferedStdout:
+    """stdout proxy that holds a prefetch thread's prints until its stage finishes."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start_buffer(self):
+        self._local.buf = []
+
+    def flush_buffer(self):
+        buf, self._local.buf = self._local.buf, None
+        with self._lock:
+            self.stream.write("".join(buf))
+            self.stream.flush()
+
+    def write(self, text):
+        buf = getattr(self._local, "buf", None)
+        if buf is not None:
+            buf.append(text)
+            return len(text)
+        with self._lock:
+            return self.stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class Stage:
+    def __init__(self, name, fn, deps, params, source):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.params = params
+        self.source = source
+
+
+class Pipeline:
+    """Lazily evaluated, disk-cached stages."""
+
+    def __init__(self, cache_dir, code_version="", force=()):
+        self.cache_dir = Path(cache_dir)
+        self.code_version = code_version
+        self.force = set(force)
+        self.stages = {}
+        self._values = {}
+        self._fingerprints = {}
+        self._futures = {}
+        self._pool = None
+        self._stdout = None
+        self.ran = []
+        self.cached = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        if self._stdout is not None:
+            sys.stdout = self._stdout.stream
+            self._stdout = None
+
+    def add(self, name, fn, deps=(), params=None, source=False):
+        """Register a stage. `fn` is called with the outputs of `deps`, in order."""
+        self.stages[name] = Stage(name, fn, deps, params, source)
+
+    def prefetch(self):
+        """Start all source stages without inputs concurrently."""
+        sources = [s for s in self.stages.values() if s.source and not s.deps]
+        if not sources:
+            return
+        self._stdout = _ThreadBufferedStdout(sys.stdout)
+        sys.stdout = self._stdout
+        self._pool = ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="prefetch")
+        for stage in sources:
+            self._futures[stage.name] = self._pool.submit(self._run_buffered, stage)
+
+    def _run_buffered(self, stage):
+        self._stdout.start_buffer()
+        try:
+            return self._run(stage)
+        finally:
+            self._stdout.flush_buffer()
+
+    def is_forced(self, name):
+        """A stage is forced if named in `force` (or 'all'), or if any of its inputs is."""
+        if name in self.force or "all" in self.force:
+            return True
+        return any(self.is_forced(dep) for dep in self.stages[name].deps)
+
+    def fingerprint(self, name):
+        if name in self._fingerprints:
+            return self._fingerprints[name]
+        stage = self.stages[name]
+        dep_fps = [self.fingerprint(dep) for dep in stage.deps]
+        if stage.source:
+            future = self._futures.pop(name, None)
+            self._values[name] = future.result() if future else self._run(stage)
+            fp = _hash(pickle.dumps(self._values[name], protocol=pickle.HIGHEST_PROTOCOL))
+        else:
+            fp = _hash(json.dumps(
+                [name, self.code_version, stage.params, dep_fps], sort_keys=True, default=str,
+            ).encode())
+        if self.is_forced(name):
+            # A fresh fingerprint also invalidates everything downstream
+            fp = _hash(f"{fp}:{time.time_ns()}".encode())
+        self._fingerprints[name] = fp
+        return fp
+
+    def _cache_path(self, name):
+        return self.cache_dir / name / f"{self.fingerprint(name)}.pkl"
+
+    def _upstream(self, name, order=None):
+        """`name` and every stage it depends on, dependencies first."""
+        order = [] if order is None else order
+        for dep in self.stages[name].deps:
+            self._upstream(dep, order)
+        if name not in order:
+            order.append(name)
+        return order
+
+    def _settled(self, name):
+        """Whether fingerprint(name) can be computed without waiting on a fetch."""
+        if name in self._fingerprints:
+            return True
+        if self.stages[name].source:
+            future = self._futures.get(name)
+            return future is not None and future.done()
+        return False
+
+    def resolve(self, name):
+        """get(name), computing cache-missing stages as soon as their inputs arrive."""
+        pending = [n for n in self._upstream(name) if not self.stages[n].source]
+        while pending:
+            ready = [n for n in pending if all(self._settled(d) for d in self.stages[n].deps)]
+            if not ready:
+                fetching = [self._futures[n] for n in self._futures if not self._futures[n].done()]
+                if fetching:
+                    wait(fetching, return_when=FIRST_COMPLETED)
+                    continue
+                # Sources not started by prefetch() run inline in fingerprint()
+                ready = pending[:1]
+            for n in ready:
+                if not self._cache_path(n).exists():
+                    self.get(n)
+                pending.remove(n)
+        return self.get(name)
+
+    def get(self, name):
+        """Output of a stage: in memory, from the stage cache, or freshly computed."""
+        fp = self.fingerprint(name)
+        if name in self._values:
+            return self._values[name]
+
+        stage_dir = self.cache_dir / name
+        path = stage_dir / f"{fp}.pkl"
+        if path.exists():
+            try:
+                with open(path, "rb") as f:
+                    value = pickle.load(f)
+                print(f"\n[{name}] cached")
+                metrics.count("stage_cache_hits")
+                self.cached.append(name)
+                self._values[name] = value
+                return value
+            except (OSError, pickle.UnpicklingError, EOFError) as e:
+                print(f"\n[{name}] unreadable cache entry ({e}), recomputing")
+
+        metrics.count("stage_cache_misses")
+        value = self._run(self.stages[name])
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        for old in stage_dir.glob("*.pkl"):
+            if old != path:
+                old.unlink(missing_ok=True)
+        self._values[name] = value
+        return value
+
+    def _run(self, stage):
+        args = [self.get(dep) for dep in stage.deps]
+        print(f"\n[{stage.name}]")
+        with metrics.span(stage.name) as span:
+            value = stage.fn(*args)
+        print(f"  [{stage.name}: {span['wall_s']:.1f}s]")
+        self.ran.append(stage.name)
+        return value
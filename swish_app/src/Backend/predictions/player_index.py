@@ -0,0 +1,70 @@
+"""
+Hash index for resolving scraped player names to per-game stats.
+
+Built once per player-stats frame (stats.nba.com or CDN-derived). Lookups go
+through (normalized name, team), then (first initial, last name, team), then
+(last name, team). Each is a dict hit. Only names that miss all three fall
+back to a substring scan of that team's roster.
+"""
+
+import unicodedata
+
+NAME_SUFFIXES = {"jr", "jr.", "sr", "sr.", "ii", "iii", "iv", "v"}
+
+
+def normalize_name(name):
+    """Strip accents and lowercase for matching."""
+    nfkd = unicodedata.normalize('NFKD', name)
+    return ''.join(c for c in nfkd if not unicodedata.combining(c)).lower().strip()
+
+
+def _name_keys(norm):
+    """(first initial, last name) of a normalized name, ignoring suffixes like 'jr.'."""
+    parts = [p for p in norm.replace(",", " ").split() if p not in NAME_SUFFIXES]
+    if not parts:
+        return "", ""
+    return parts[0][0], parts[-1]
+
+
+class PlayerIndex:
+    """Player importance lookups keyed by normalized name and team."""
+
+    def __init__(self, frame):
+        if '_norm' not in frame.columns:
+            frame = frame.assign(_norm=frame['PLAYER_NAME'].map(normalize_name))
+        self.frame = frame
+        self._by_name = {}
+        self._by_initial_last = {}
+        self._by_last = {}
+        self._rosters = {}
+
+        # setdefault keeps the first row per key, like the old match.iloc[0]
+        for norm, team, importance in zip(frame['_norm'], frame['TEAM_FULL_NAME'], frame['IMPORTANCE']):
+            initial, last = _name_keys(norm)
+            self._by_name.setdefault((norm, team), importance)
+            self._by_initial_last.setdefault((initial, last, team), importance)
+            self._by_last.setdefault((last, team), importance)
+            self._rosters.setdefault(team, []).append((norm, importance))
+
+    def __len__(self):
+        return len(self.frame)
+
+    def importance(self, player_name, team):
+        """Return the player's IMPORTANCE on `team`, or None if unresolved."""
+        norm = normalize_name(player_name)
+        if not norm:
+            return None
+        hit = self._by_name.get((norm, team))
+        if hit is not None:
+            return hit
+        initial, last = _name_keys(norm)
+        hit = self._by_initial_last.get((initial, last, team))
+        if hit is not None:
+            return hit
+        hit = self._by_last.get((last, team))
+        if hit is not None:
+            return hit
+        for roster_norm, importance in self._rosters.get(team, ()):
+            if last and last in roster_norm:
+                return importance
+        return None
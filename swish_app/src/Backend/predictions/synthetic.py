@@ -0,0 +1,160 @@
+"""
+Synthetic league generator for benchmarking the prediction pipeline offline.
+
+Produces schedule-consistent team game logs in the same shape that
+fetch_team_game_logs() returns: every game has a home and an away row, no team
+plays twice on one day, and each team plays GAMES_PER_TEAM games per season.
+Scores follow a latent per-team strength so the model has something to learn.
+
+generate_player_stats() and generate_injuries() build the matching
+LeagueDashPlayerStats-style frame and CBS-style injury table for the latest
+season, so the injury and prediction stages can run offline too.
+"""
+
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import backend_path
+from core import all_teams, season_label
+
+GAMES_PER_TEAM = 82
+MAX_SEASONS = 20
+PLAYERS_PER_TEAM = 15
+INJURY_STATUSES = ["Out", "Out For Season", "Doubtful", "Day-To-Day", "Questionable", "Probable"]
+FIRST_NAMES = ["James", "Marcus", "Luka", "Nikola", "Jalen", "Anthony", "Tyrese", "Devin",
+               "Jaylen", "De'Aaron", "Karl-Anthony", "Shai", "Domantas", "Paolo", "Victor"]
+LAST_NAMES = ["Brown", "Johnson", "Williams", "Dončić", "Jokić", "Green", "Davis", "Smith Jr.",
+              "Porziņģis", "Walker", "Holiday", "Murray", "Edwards", "Mitchell", "Harris"]
+
+
+def _season_schedule(rng, n_teams):
+    """Return [(day_offset, home_idx, away_idx)] with GAMES_PER_TEAM games per team."""
+    remaining = np.full(n_teams, GAMES_PER_TEAM)
+    schedule = []
+    day = 0
+    while remaining.sum() > 0:
+        # Teams with the most games left get priority so the season ends evenly
+        order = rng.permutation(n_teams)
+        order = order[np.argsort(-remaining[order], kind="stable")]
+        playing = [t for t in order if remaining[t] > 0 and rng.random() < 0.55]
+        if len(playing) % 2:
+            playing.pop()
+        for home, away in zip(playing[::2], playing[1::2]):
+            if rng.random() < 0.5:
+                home, away = away, home
+            schedule.append((day, home, away))
+            remaining[home] -= 1
+            remaining[away] -= 1
+        day += 1
+        # A lone team left with games gets a final matchup against anyone
+        if (remaining > 0).sum() == 1:
+            t = int(np.flatnonzero(remaining)[0])
+            schedule.append((day, t, (t + 1) % n_teams))
+            remaining[t] -= 1
+    return schedule
+
+
+def generate_game_logs(n_seasons=1, first_year=None, seed=0):
+    """Generate `n_seasons` (1 to MAX_SEASONS) consecutive seasons of team game logs."""
+    if not 1 <= n_seasons <= MAX_SEASONS:
+        raise ValueError(f"n_seasons must be between 1 and {MAX_SEASONS}, got {n_seasons}")
+    rng = np.random.default_rng(seed)
+    teams = all_teams()
+    n_teams = len(teams)
+    first_year = first_year or date.today().year - n_seasons
+    team_ids = np.array([t["id"] for t in teams])
+    names = np.array([t["full_name"] for t in teams], dtype=object)
+    tricodes = np.array([t["abbreviation"] for t in teams], dtype=object)
+
+    frames = []
+    for k in range(n_seasons):
+        year = first_year + k
+        strength = rng.normal(0, 5, n_teams)
+        sched = np.array(_season_schedule(rng, n_teams))
+        n_games = len(sched)
+        days, home, away = sched[:, 0], sched[:, 1], sched[:, 2]
+
+        game_dates = np.datetime64(date(year, 10, 21)) + days.astype("timedelta64[D]")
+        home_pts = np.round(112 + 2 + strength[home] - strength[away] / 2 + rng.normal(0, 11, n_games))
+        away_pts = np.round(112 + strength[away] - strength[home] / 2 + rng.normal(0, 11, n_games))
+        away_pts = np.where(home_pts == away_pts, away_pts - 1, away_pts)
+        game_ids = np.array([f"002{str(year)[-2:]}{i + 1:05d}" for i in range(n_games)])
+
+        for is_home, team, opp, pts, opp_pts in (
+            (True, home, away, home_pts, away_pts),
+            (False, away, home, away_pts, home_pts),
+        ):
+            sep = " vs. " if is_home else " @ "
+            frames.append(pd.DataFrame({
+                "SEASON": season_label(year),
+                "GAME_ID": game_ids,
+                "TEAM_ID": team_ids[team],
+                "TEAM_NAME": names[team],
+                "GAME_DATE": game_dates.astype("datetime64[ns]"),
+                "MATCHUP": tricodes[team] + sep + tricodes[opp],
+                "WL": np.where(pts > opp_pts, "W", "L"),
+                "PTS": pts.astype(np.int64),
+                "AST": rng.integers(18, 34, n_games),
+                "REB": rng.integers(34, 54, n_games),
+                "FG_PCT": np.round(rng.normal(0.47, 0.04, n_games), 3),
+            }))
+
+    return pd.concat(frames, ignore_index=True).sort_values(
+        ["GAME_DATE", "GAME_ID", "TEAM_ID"]
+    ).reset_index(drop=True)
+
+
+def generate_player_stats(game_logs, players_per_team=PLAYERS_PER_TEAM, seed=0):
+    """Per-game player averages for every team in the latest season of `game_logs`.
+
+    Same columns fetch_player_stats() relies on (PLAYER_NAME, TEAM_ID,
+    TEAM_FULL_NAME, PTS, REB, AST, IMPORTANCE). Names reuse a small pool with
+    accents and suffixes, so the same name shows up on several teams.
+    """
+    rng = np.random.default_rng(seed)
+    latest = game_logs[game_logs["SEASON"] == game_logs["SEASON"].max()]
+    team_list = latest.drop_duplicates("TEAM_ID")[["TEAM_ID", "TEAM_NAME"]]
+    n = len(team_list) * players_per_team
+
+    # Minutes-ordered roster: starters score the most
+    rank = np.tile(np.arange(players_per_team), len(team_list))
+    scale = np.exp(-rank / 5.0)
+    player_df = pd.DataFrame({
+        "PLAYER_ID": np.arange(1_000_000, 1_000_000 + n),
+        "PLAYER_NAME": [f"{FIRST_NAMES[f]} {LAST_NAMES[l]}" for f, l in
+                        zip(rng.integers(0, len(FIRST_NAMES), n), rng.integers(0, len(LAST_NAMES), n))],
+        "TEAM_ID": np.repeat(team_list["TEAM_ID"].to_numpy(), players_per_team),
+        "TEAM_FULL_NAME": np.repeat(team_list["TEAM_NAME"].to_numpy(), players_per_team),
+        "PTS": np.round(scale * rng.uniform(18, 30, n) + rng.uniform(1, 4, n), 1),
+        "REB": np.round(scale * rng.uniform(4, 11, n) + rng.uniform(0.5, 2, n), 1),
+        "AST": np.round(scale * rng.uniform(2, 8, n) + rng.uniform(0.2, 1.5, n), 1),
+    })
+    player_df["IMPORTANCE"] = player_df["PTS"] + player_df["REB"] + player_df["AST"]
+    return player_df
+
+
+def generate_injuries(player_stats, rate=0.12, seed=0):
+    """A CBS-style injury table (Team, Player, Position, Status, Injury, Est_Return).
+
+    About `rate` of the players are listed. Some names are abbreviated to
+    'F. Last' and the LA teams use their short labels, as on the real page.
+    """
+    rng = np.random.default_rng(seed)
+    hurt = player_stats[rng.random(len(player_stats)) < rate]
+    names = []
+    for name in hurt["PLAYER_NAME"]:
+        first, _, last = name.partition(" ")
+        names.append(f"{first[0]}. {last}" if rng.random() < 0.2 else name)
+    teams = hurt["TEAM_FULL_NAME"].replace({
+        "Los Angeles Clippers": "LA Clippers", "Los Angeles Lakers": "L.A. Lakers",
+    })
+    return pd.DataFrame({
+        "Team": teams.to_numpy(),
+        "Player": names,
+        "Position": rng.choice(["G", "F", "C"], len(hurt)),
+        "Status": rng.choice(INJURY_STATUSES, len(hurt)),
+        "Injury": rng.choice(["Ankle", "Knee", "Hamstring", "Back", "Illness"], len(hurt)),
+        "Est_Return": "",
+    })
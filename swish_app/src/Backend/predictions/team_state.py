@@ -0,0 +1,186 @@
+"""
+Incremental per-team and per-matchup feature state.
+
+Every pre-game feature is a running aggregate (expanding means, last-5 win pct,
+streak, venue pct, rest days, head-to-head record), so a night's games can be
+folded into a small persisted state in O(new games) instead of recomputing the
+whole season. The state always describes a team *before its next game*.
+
+Each team also keeps a digest of the rows folded into it. The nightly
+reconcile re-fetch can correct games that were already applied, so teams whose
+stored rows no longer match their digest are refolded from scratch.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+RECENT_GAMES = 5
+# The columns apply() reads; a change to any of them in an applied row means a refold
+FOLD_COLUMNS = ["GAME_ID", "GAME_DATE", "TEAM_NAME", "OPP_TEAM_NAME", "HOME_GAME", "WIN",
+                "PTS", "AST", "REB", "FG_PCT"]
+
+
+def _new_team():
+    return {
+        "games": 0, "wins": 0, "pts": 0.0, "ast": 0.0, "reb": 0.0, "fg_pct": 0.0,
+        "recent": [], "streak": 0,
+        "home_wins": 0, "home_games": 0, "road_wins": 0, "road_games": 0,
+        "last_date": None,
+        "digest": 0,  # sum of the applied rows' hashes, mod 2**64
+    }
+
+
+def _row_hashes(rows):
+    return pd.util.hash_pandas_object(rows[FOLD_COLUMNS], index=False)
+
+
+class TeamState:
+    """Running pre-game aggregates for one season."""
+
+    def __init__(self, season):
+        self.season = season
+        self.teams = {}
+        self.h2h = {}  # "TEAM|OPP" -> [wins, games]
+        self.through_date = None  # ISO date of the latest applied game
+        self.through_ids = []  # game IDs already applied on through_date
+        self.rows_applied = 0
+
+    @classmethod
+    def load(cls, path, season):
+        """Load persisted state, or start fresh if missing or for another season."""
+        path = Path(path)
+        state = cls(season)
+        if path.exists():
+            with open(path, "r") as f:
+                data = json.load(f)
+            if data.get("season") == season:
+                state.__dict__.update(data)
+        return state
+
+    def save(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.__dict__, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _applied(self, df):
+        dates = df["GAME_DATE"].dt.strftime("%Y-%m-%d")
+        return (dates < self.through_date) | (
+            (dates == self.through_date) & df["GAME_ID"].isin(self.through_ids)
+        )
+
+    def pending(self, df):
+        """Rows of an engineered season frame not yet folded into the state.
+
+        Returns None if the frame contradicts the state (e.g. a game was
+        back-filled before through_date, or the state predates digests),
+        meaning the state must be rebuilt.
+        """
+        if self.through_date is None:
+            return df
+        if any("digest" not in t for t in self.teams.values()):
+            return None
+        already = self._applied(df)
+        if int(already.sum()) != self.rows_applied:
+            return None
+        return df[~already]
+
+    def corrected(self, df):
+        """Teams whose already-applied rows in `df` differ from what was folded in."""
+        if self.through_date is None:
+            return []
+        applied = df[self._applied(df)]
+        digests = _row_hashes(applied).groupby(applied["TEAM_NAME"].values).sum()
+        return sorted(name for name, t in self.teams.items()
+                      if int(digests.get(name, 0)) != t["digest"])
+
+    def refold(self, df, teams):
+        """Recompute `teams` from their already-applied rows in `df`."""
+        applied = df[self._applied(df) & df["TEAM_NAME"].isin(teams)]
+        for name in teams:
+            self.teams[name] = _new_team()
+            for key in [k for k in self.h2h if k.startswith(f"{name}|")]:
+                del self.h2h[key]
+        self._fold(applied)
+
+    def apply(self, rows):
+        """Fold team-game rows (engineered: WIN, HOME_GAME, OPP_TEAM_NAME) into the state."""
+        rows = self._fold(rows)
+        for game_date, game_id in zip(rows["GAME_DATE"].dt.strftime("%Y-%m-%d"), rows["GAME_ID"]):
+            if game_date != self.through_date:
+                self.through_date = game_date
+                self.through_ids = []
+            if game_id not in self.through_ids:
+                self.through_ids.append(str(game_id))
+            self.rows_applied += 1
+
+    def _fold(self, rows):
+        """Add rows to their teams' aggregates in game order. Returns the sorted rows."""
+        rows = rows.sort_values(["GAME_DATE", "GAME_ID"])
+        hashes = _row_hashes(rows).tolist()
+        for r, row_hash in zip(rows.itertuples(index=False), hashes):
+            t = self.teams.setdefault(r.TEAM_NAME, _new_team())
+            t["digest"] = (t["digest"] + row_hash) % 2 ** 64
+            win = int(r.WIN)
+            t["games"] += 1
+            t["wins"] += win
+            t["pts"] += float(r.PTS)
+            t["ast"] += float(r.AST)
+            t["reb"] += float(r.REB)
+            t["fg_pct"] += float(r.FG_PCT)
+            t["recent"] = (t["recent"] + [win])[-RECENT_GAMES:]
+            if win:
+                t["streak"] = t["streak"] + 1 if t["streak"] > 0 else 1
+            else:
+                t["streak"] = t["streak"] - 1 if t["streak"] < 0 else -1
+            venue = "home" if r.HOME_GAME else "road"
+            t[f"{venue}_wins"] += win
+            t[f"{venue}_games"] += 1
+            t["last_date"] = r.GAME_DATE.strftime("%Y-%m-%d")
+
+            pair = self.h2h.setdefault(f"{r.TEAM_NAME}|{r.OPP_TEAM_NAME}", [0, 0])
+            pair[0] += win
+            pair[1] += 1
+        return rows
+
+    def pre_game(self, team_name):
+        """Pre-game features for a team's next game (build_pre_game_stats names), or None."""
+        t = self.teams.get(team_name)
+        if not t or not t["games"]:
+            return None
+        n = t["games"]
+        return {
+            "PRE_PTS_avg": t["pts"] / n,
+            "PRE_AST_avg": t["ast"] / n,
+            "PRE_REB_avg": t["reb"] / n,
+            "PRE_FG_PCT": t["fg_pct"] / n,
+            "RECENT_WIN_PCT": sum(t["recent"]) / len(t["recent"]),
+            "PRE_WIN_STREAK": t["streak"],
+            "PRE_HOME_PCT": t["home_wins"] / t["home_games"] if t["home_games"] else 0.0,
+            "PRE_ROAD_PCT": t["road_wins"] / t["road_games"] if t["road_games"] else 0.0,
+            "PRE_WIN_PCT": t["wins"] / n,
+        }
+
+    def pre_game_frame(self):
+        """pre_game() for every team with games, as a DataFrame indexed by team name."""
+        rows = {name: self.pre_game(name) for name in self.teams}
+        return pd.DataFrame.from_dict(
+            {name: f for name, f in rows.items() if f is not None}, orient="index",
+        )
+
+    def days_rest(self, team_name, game_date):
+        """Full days off before a game on `game_date`; None if the team has no games."""
+        t = self.teams.get(team_name)
+        if not t or t["last_date"] is None:
+            return None
+        return max((pd.Timestamp(game_date) - pd.Timestamp(t["last_date"])).days - 1, 0)
+
+    def head_to_head(self, team_name, opp_name):
+        """(wins, games) for team_name against opp_name so far this season."""
+        wins, games = self.h2h.get(f"{team_name}|{opp_name}", (0, 0))
+        return wins, games
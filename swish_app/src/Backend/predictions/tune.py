@@ -0,0 +1,319 @@
+"""
+Hyperparameter search for the game predictor.
+
+Trials are scored on the same training set generate.py trains on: the
+multi-season corpus from load_training_set(), with its recency sample weights.
+Random trials are scored by time-ordered cross-validation over those rows:
+every fold trains on all games before a cutoff date and validates on the block
+after it. Trials run in parallel on a process pool. Each worker builds a fold's
+QuantileDMatrix once and reuses it for every trial it runs. Weak trials are
+dropped by successive halving. All trials see the first (cheapest) fold, and
+only the best third go on to the next one. Trial 0, the default configuration,
+is kept through every round as the reference, so the defaults are scored on
+exactly the folds the winner is.
+
+--budget is a deadline for the whole search. It is checked as each trial
+finishes, and every fit stops boosting once it passes. A fold that can't
+finish in time is dropped, except the first, which keeps the trials that
+completed.
+
+The winner is written to cache/model/params.json. generate.py and backtest.py
+apply it on their next run.
+
+Usage: python tune.py [--season 2025-26 | --synthetic-seasons N] [--history 3]
+                      [--trials 30] [--budget 600]
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+import numpy as np
+import xgboost as xgb
+
+import generate
+import model_store
+import synthetic
+from backtest import load_matchups
+from corpus import MatchupCorpus
+from gamelog_store import GameLogStore
+
+TUNE_DIR = generate.CACHE_DIR / "tune"
+
+MAX_BIN = 256
+MAX_ROUNDS = 1000
+EARLY_STOPPING_ROUNDS = 30
+# Fraction of trials kept after each fold
+HALVING_ETA = 3
+
+# Set once per worker process by _init_worker
+_X = None
+_y = None
+_w = None
+_folds = None
+_matrices = {}
+
+
+def _init_worker(paths, folds):
+    global _X, _y, _w, _folds
+    _X, _y, _w = (np.load(path, mmap_mode="r") for path in paths)
+    _folds = folds
+
+
+def _fold_matrices(k):
+    """Quantized (train, valid) matrices for fold k, built on first use in this worker."""
+    if k not in _matrices:
+        train_end, valid_end = _folds[k]
+        dtrain = xgb.QuantileDMatrix(_X[:train_end], _y[:train_end], weight=_w[:train_end],
+                                     max_bin=MAX_BIN)
+        dvalid = xgb.QuantileDMatrix(_X[train_end:valid_end], _y[train_end:valid_end], ref=dtrain)
+        _matrices[k] = dtrain, dvalid
+    return _matrices[k]
+
+
+class _Deadline(xgb.callback.TrainingCallback):
+    """Stop boosting once the search's wall-clock deadline has passed."""
+
+    def __init__(self, deadline):
+        super().__init__()
+        self.deadline = deadline
+        self.hit = False
+
+    def after_iteration(self, model, epoch, evals_log):
+        self.hit = time.time() >= self.deadline
+        return self.hit
+
+
+def _evaluate(job):
+    """Fit one trial on one fold with early stopping, stopping at `deadline`.
+
+    Returns (trial, fold, logloss, rounds, completed). A fit the deadline cut
+    short is not scored: (trial, fold, None, None, False).
+    """
+    trial_id, params, k, deadline = job
+    if time.time() >= deadline:
+        return trial_id, k, None, None, False
+    dtrain, dvalid = _fold_matrices(k)
+    deadline_cb = _Deadline(deadline)
+    booster = xgb.train(
+        {
+            "objective": "binary:logistic",
+            "eval_metric": "logloss",
+            "tree_method": "hist",
+            "max_bin": MAX_BIN,
+            "nthread": 1,
+            **params,
+        },
+        dtrain,
+        num_boost_round=MAX_ROUNDS,
+        evals=[(dvalid, "valid")],
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        verbose_eval=False,
+        callbacks=[deadline_cb],
+    )
+    if deadline_cb.hit:
+        return trial_id, k, None, None, False
+    return trial_id, k, float(booster.best_score), booster.best_iteration + 1, True
+
+
+def sample_trials(n_trials, seed):
+    """Trial 0 is the current default configuration; the rest are random draws."""
+    rng = np.random.default_rng(seed)
+    defaults = {k: v for k, v in generate.XGB_PARAMS.items() if k not in ("eval_metric", "n_estimators")}
+    trials = [defaults]
+    for _ in range(n_trials - 1):
+        trials.append({
+            "max_depth": int(rng.integers(2, 9)),
+            "learning_rate": float(np.exp(rng.uniform(np.log(0.01), np.log(0.3)))),
+            "subsample": float(rng.uniform(0.5, 1.0)),
+            "colsample_bytree": float(rng.uniform(0.5, 1.0)),
+            "min_child_weight": float(np.exp(rng.uniform(0.0, np.log(20.0)))),
+            "reg_lambda": float(np.exp(rng.uniform(np.log(0.1), np.log(10.0)))),
+        })
+    return trials
+
+
+def time_folds(dates, n_folds):
+    """Expanding-window (train_end, valid_end) row cutoffs, snapped to date boundaries."""
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+    cuts = []
+    for q in np.linspace(0.5, 1.0, n_folds + 1):
+        row = int(len(dates) * q)
+        cuts.append(len(dates) if row >= len(dates) else int(starts[np.searchsorted(starts, row)]))
+    return [(a, b) for a, b in zip(cuts[:-1], cuts[1:]) if b > a]
+
+
+def load_training_data(season, history, season_decay, synthetic_seasons=0):
+    """The weighted multi-season training set generate.py would train on.
+
+    Returns (features, X, y, sample weights, GAME_DATE per row), oldest first.
+    With `synthetic_seasons`, the seasons come from synthetic.py and their
+    partitions are written to a scratch corpus under TUNE_DIR instead.
+    """
+    if synthetic_seasons:
+        logs = synthetic.generate_game_logs(n_seasons=synthetic_seasons)
+        seasons = sorted(logs["SEASON"].unique())[-(history + 1):]
+        matchups = {
+            s: generate.build_matchups(generate.build_pre_game_stats(
+                generate.engineer_features(logs[logs["SEASON"] == s])))
+            for s in seasons
+        }
+        corpus_dir = TUNE_DIR / "corpus"
+        for past in seasons[:-1]:
+            MatchupCorpus(corpus_dir).write(past, matchups[past], digest=None)
+        matchup_df = matchups[seasons[-1]]
+    else:
+        store = GameLogStore(generate.GAMELOG_STORE_PATH)
+        try:
+            past = [s for s in generate.season_range(season, history)[:-1]
+                    if store.last_game_date(s) is not None]
+        finally:
+            store.close()
+        generate.update_corpus(past)
+        seasons = past + [season]
+        corpus_dir = generate.CORPUS_DIR
+        matchup_df = load_matchups(season, 0)
+
+    features, X, y, w = generate.load_training_set(seasons, matchup_df, season_decay,
+                                                   corpus_dir=corpus_dir)
+    return features, X, y, w, MatchupCorpus(corpus_dir).dates(seasons)
+
+
+def _save_arrays(X, y, w):
+    """Write the training arrays as .npy files for workers to memory-map."""
+    TUNE_DIR.mkdir(parents=True, exist_ok=True)
+    paths = [str(TUNE_DIR / f"{name}.npy") for name in ("X", "y", "w")]
+    for path, array in zip(paths, (X, y, w)):
+        np.save(path, array)
+    return paths
+
+
+def _run_fold(pool, jobs, losses, rounds, deadline):
+    """Score `jobs` on one fold. Returns False if the deadline stopped it short.
+
+    Results are recorded as trials finish; once the deadline passes, queued
+    trials are cancelled and fits still running stop at their next round.
+    Only trials that completed are recorded.
+    """
+    pending = {pool.submit(_evaluate, job) for job in jobs}
+    complete = True
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.cancelled():
+                continue
+            trial_id, _, loss, n_rounds, finished = future.result()
+            if finished:
+                losses[trial_id].append(loss)
+                rounds[trial_id].append(n_rounds)
+            else:
+                complete = False
+        if complete and pending and time.time() >= deadline:
+            complete = False
+        if not complete:
+            for future in pending:
+                future.cancel()
+    return complete
+
+
+def search(features, X, y, w, dates, n_trials=30, n_folds=4, workers=None, budget=600, seed=0):
+    """Successive-halving search within `budget` seconds. Returns (best params, summary)."""
+    paths = _save_arrays(X, y, w)
+    folds = time_folds(dates, n_folds)
+    trials = sample_trials(n_trials, seed)
+    workers = workers or os.cpu_count()
+    print(f"  {len(trials)} trials, {len(folds)} folds, {len(X)} matchups, {workers} workers")
+
+    losses = {i: [] for i in range(len(trials))}
+    rounds = {i: [] for i in range(len(trials))}
+    alive = list(range(len(trials)))
+    t0 = time.perf_counter()
+    deadline = time.time() + budget
+    with xgb.config_context(verbosity=0), ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(paths, folds),
+    ) as pool:
+        for k in range(len(folds)):
+            jobs = [(i, trials[i], k, deadline) for i in alive]
+            if not _run_fold(pool, jobs, losses, rounds, deadline):
+                if k:
+                    # Keep every surviving trial on the same folds
+                    for i in alive:
+                        del losses[i][k:], rounds[i][k:]
+                    print(f"  Time budget of {budget}s reached, stopping after {k} folds")
+                    break
+                alive = [i for i in alive if losses[i]]
+                if not alive:
+                    raise SystemExit(f"No trial finished a fold within the {budget}s budget")
+                print(f"  Time budget of {budget}s reached during fold 1, "
+                      f"{len(alive)} of {len(jobs)} trials finished it")
+                alive.sort(key=lambda i: np.mean(losses[i]))
+                break
+            alive.sort(key=lambda i: np.mean(losses[i]))
+            best = alive[0]
+            print(f"  Fold {k + 1}/{len(folds)}: {len(jobs)} trials, best logloss "
+                  f"{np.mean(losses[best]):.4f} (trial {best}) [{time.perf_counter() - t0:.1f}s]")
+            if k < len(folds) - 1:
+                kept = alive[:max(1, math.ceil(len(alive) / HALVING_ETA))]
+                alive = kept if 0 in kept else kept + [0]
+
+    best = alive[0]
+    params = {
+        "eval_metric": "logloss",
+        "n_estimators": int(round(np.mean(rounds[best]))),
+        **trials[best],
+    }
+    summary = {
+        "cv_logloss": float(np.mean(losses[best])),
+        # None if the budget ran out before the defaults finished the first fold
+        "default_logloss": float(np.mean(losses[0])) if losses[0] else None,
+        "folds_evaluated": len(losses[best]),
+        "trials": len(trials),
+        "features": features,
+        "n_rows": len(X),
+        "seconds": time.perf_counter() - t0,
+        "tuned_at": datetime.now().isoformat(),
+    }
+    return params, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the game predictor's XGBoost parameters.")
+    parser.add_argument("--season", default=generate.get_current_season())
+    parser.add_argument("--synthetic-seasons", type=int, default=0,
+                        help="tune on N synthetic seasons instead of stored logs")
+    parser.add_argument("--history", type=int, default=generate.HISTORY_SEASONS,
+                        help="completed seasons in the training set, as in generate.py "
+                             f"(default {generate.HISTORY_SEASONS})")
+    parser.add_argument("--season-decay", type=float, default=generate.SEASON_DECAY,
+                        help=f"sample weight per season back (default {generate.SEASON_DECAY})")
+    parser.add_argument("--trials", type=int, default=30)
+    parser.add_argument("--folds", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--budget", type=int, default=600,
+                        help="seconds the whole search may take")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--dry-run", action="store_true", help="don't write params.json")
+    args = parser.parse_args()
+
+    features, X, y, w, dates = load_training_data(
+        args.season, args.history, args.season_decay, args.synthetic_seasons)
+    params, summary = search(
+        features, X, y, w, dates, n_trials=args.trials, n_folds=args.folds,
+        workers=args.workers, budget=args.budget, seed=args.seed,
+    )
+    print(f"\n  Best: {params}")
+    if summary["default_logloss"] is None:
+        print(f"  CV logloss {summary['cv_logloss']:.4f} ({summary['seconds']:.1f}s)")
+    else:
+        print(f"  CV logloss {summary['cv_logloss']:.4f} vs {summary['default_logloss']:.4f} "
+              f"for the defaults ({summary['seconds']:.1f}s)")
+    if not args.dry_run:
+        model_store.save_params(generate.MODEL_DIR, params, summary)
+        print(f"  Saved {generate.MODEL_DIR / 'params.json'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Client-side rate limiting for stats.nba.com.
+
+stats.nba.com throttles by request rate and answers overload with timeouts,
+429s or dropped connections. The scripts used to sleep a fixed delay after
+every call. These helpers let a small worker pool share one request budget
+instead:
+
+- TokenBucket: at most `rate` requests per second across all threads
+- CircuitBreaker: after repeated failures, every worker pauses for a cooldown
+- call(): one request through the bucket and breaker, with exponential
+  backoff and full jitter between retries
+- Progress: throughput and ETA lines for long loops
+"""
+
+import random
+import threading
+import time
+
+import metrics
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitOpen(Exception):
+    """The breaker stayed open; the endpoint is considered down."""
+
+
+class CircuitBreaker:
+    """Pause every worker once `threshold` calls in a row have failed.
+
+    Each trip in a row doubles the cooldown, up to `max_cooldown`. After
+    `max_trips` trips without a success, wait() raises CircuitOpen so a run
+    against a dead endpoint ends instead of retrying forever.
+    """
+
+    def __init__(self, threshold=5, cooldown=30, max_cooldown=300, max_trips=4):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.max_trips = max_trips
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block while the breaker is open."""
+        while True:
+            with self._lock:
+                if self._trips >= self.max_trips:
+                    raise CircuitOpen(f"endpoint failing after {self._trips} cooldowns")
+                remaining = self._open_until - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(remaining)
+
+    def success(self):
+        with self._lock:
+            self._failures = 0
+            self._trips = 0
+
+    def failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures < self.threshold or time.monotonic() < self._open_until:
+                return
+            cooldown = min(self.cooldown * 2 ** self._trips, self.max_cooldown)
+            self._trips += 1
+            self._failures = 0
+            self._open_until = time.monotonic() + cooldown
+        metrics.count("breaker_trips")
+        print(f"      ⛔ {self.threshold} failures in a row, pausing all workers for {cooldown:.0f}s")
+
+
+def backoff(attempt, base=1.0, cap=60.0):
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def is_throttled(exc):
+    """Whether an error looks like stats.nba.com shedding load rather than a bad request."""
+    response = getattr(exc, "response", None)
+    if response is not None and response.status_code in (429, 503):
+        return True
+    name = type(exc).__name__
+    return "Timeout" in name or "Connection" in name
+
+
+def call(func, bucket, breaker, max_retries=3, base_delay=1.0, description="API call"):
+    """Run `func()` within the rate limit, retrying failures with jittered backoff.
+
+    `description` names the call in retry messages.
+    """
+    for attempt in range(max_retries):
+        breaker.wait()
+        bucket.acquire()
+        try:
+            result = func()
+        except Exception as e:
+            breaker.failure()
+            if attempt == max_retries - 1:
+                raise
+            # Throttling gets a longer backoff so the pool actually eases off
+            delay = backoff(attempt + (2 if is_throttled(e) else 0), base_delay)
+            print(f"      ⚠️  {description}: retry {attempt + 1}/{max_retries} in {delay:.1f}s...")
+            metrics.count("retries")
+            time.sleep(delay)
+        else:
+            breaker.success()
+            return result
+
+
+class Progress:
+    """Prints done/total, throughput and ETA at most every `interval` seconds."""
+
+    def __init__(self, total, label="items", interval=10.0):
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.done = 0
+        self._started = time.monotonic()
+        self._last = self._started
+
+    def tick(self, n=1):
+        self.done += n
+        now = time.monotonic()
+        if now - self._last < self.interval and self.done < self.total:
+            return
+        self._last = now
+        elapsed = now - self._started
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - self.done) / rate if rate > 0 else float("inf")
+        print(f"\n--- Progress: {self.done}/{self.total} {self.label} "
+              f"({rate:.2f}/s, ETA {eta:.0f}s) ---\n")
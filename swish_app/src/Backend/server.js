@@ -4,6 +4,8 @@ const { spawn } = require("child_process");
 const cors = require("cors");
 const path = require("path");
 const fs = require("fs");
+const crypto = require("crypto");
+const zlib = require("zlib");
 
 // Fix: Go up two levels from src/Backend to reach the root .env
 // path.resolve(__dirname) is src/Backend.
@@ -45,7 +47,7 @@ function runPython(scriptName, args = []) {
 
     script.stderr.on("data", (data) => {
       error += data.toString();
-      console.error("Python Error:", data.toString());
+      console.error(`[${scriptName}]`, data.toString());
     });
 
     script.on("close", (code) => {
@@ -223,16 +225,88 @@ app.get("/api/highlights", async (req, res) => {
   }
 });
 
+// Helper: send a JSON file written by jsonfile.py. Its .etag sidecar becomes
+// the ETag, and the .br/.gz siblings are sent as-is when the client accepts
+// them. The siblings are only trusted while the sidecar is at least as new as
+// the JSON itself; otherwise the plain file is sent.
+function sendDataFile(req, res, filePath, callback) {
+  const etagPath = `${filePath}.etag`;
+  let etag = null;
+  try {
+    if (fs.statSync(etagPath).mtimeMs >= fs.statSync(filePath).mtimeMs) {
+      etag = `"${fs.readFileSync(etagPath, "utf8").trim()}"`;
+    }
+  } catch {
+    // no sidecar (or no file): fall through to a plain sendFile
+  }
+  if (!etag) {
+    return res.sendFile(filePath, callback);
+  }
+
+  res.set({ ETag: etag, "Cache-Control": "no-cache", Vary: "Accept-Encoding" });
+  if (req.headers["if-none-match"] === etag) {
+    return res.status(304).end();
+  }
+  const accepted = req.headers["accept-encoding"] || "";
+  for (const [encoding, ext] of [["br", ".br"], ["gzip", ".gz"]]) {
+    if (accepted.includes(encoding) && fs.existsSync(filePath + ext)) {
+      res.type("json").set("Content-Encoding", encoding);
+      return res.sendFile(filePath + ext, { etag: false }, callback);
+    }
+  }
+  res.sendFile(filePath, { etag: false }, callback);
+}
+
+// Helper: write a JSON file the way jsonfile.py's write_json() does. It writes
+// minified JSON, .gz/.br siblings and the .etag sidecar (first 32 hex chars of
+// its sha256), each through a temp file and rename. The siblings and sidecar
+// go first, and the JSON gets the sidecar's mtime, so sendDataFile never pairs
+// a new ETag with an old body. Unchanged content is not rewritten.
+function writeDataFile(filePath, data) {
+  const body = Buffer.from(JSON.stringify(data));
+  const digest = crypto.createHash("sha256").update(body).digest("hex").slice(0, 32);
+  const etagPath = `${filePath}.etag`;
+  try {
+    if (
+      fs.statSync(etagPath).mtimeMs >= fs.statSync(filePath).mtimeMs &&
+      fs.readFileSync(etagPath, "utf8").trim() === digest
+    ) {
+      return false;
+    }
+  } catch {
+    // first write, or a missing sidecar: write everything
+  }
+
+  const replace = (target, contents, mtime) => {
+    const tmpPath = path.join(path.dirname(target), `.${path.basename(target)}.tmp`);
+    fs.writeFileSync(tmpPath, contents);
+    if (mtime !== undefined) {
+      fs.utimesSync(tmpPath, mtime, mtime);
+    }
+    fs.renameSync(tmpPath, target);
+  };
+  fs.mkdirSync(path.dirname(filePath), { recursive: true });
+  replace(`${filePath}.gz`, zlib.gzipSync(body, { level: 9 }));
+  replace(
+    `${filePath}.br`,
+    zlib.brotliCompressSync(body, { params: { [zlib.constants.BROTLI_PARAM_QUALITY]: 11 } }),
+  );
+  replace(etagPath, digest);
+  // Round down to whole ms so the JSON is never newer than its sidecar
+  replace(filePath, body, Math.floor(fs.statSync(etagPath).mtimeMs) / 1000);
+  return true;
+}
+
 // Serve player data
-app.get("/api/players", (_req, res) => {
+app.get("/api/players", (req, res) => {
   const playersPath = path.join(__dirname, "data/players.json");
-  res.sendFile(playersPath);
+  sendDataFile(req, res, playersPath);
 });
 
 // Serve predictions data
-app.get("/api/predictions", (_req, res) => {
+app.get("/api/predictions", (req, res) => {
   const predictionsPath = path.join(__dirname, "data/predictions.json");
-  res.sendFile(predictionsPath, (err) => {
+  sendDataFile(req, res, predictionsPath, (err) => {
     if (err) {
       res.status(404).json({ success: false, error: "No predictions available yet" });
     }
@@ -280,12 +354,8 @@ app.get("/api/scores", async (req, res) => {
       games,
     };
 
-    const publicDataDir = path.resolve(__dirname, "../../public/data");
-    fs.mkdirSync(publicDataDir, { recursive: true });
-    fs.writeFileSync(
-      path.join(publicDataDir, "live_scores.json"),
-      JSON.stringify(liveScores, null, 2),
-    );
+    // Same writer as fetch_live_data.py, so the sidecars stay in step
+    writeDataFile(path.resolve(__dirname, "../../public/data/live_scores.json"), liveScores);
 
     res.json({ success: true, data: scoreboard });
   } catch (err) {
@@ -295,8 +365,15 @@ app.get("/api/scores", async (req, res) => {
 
 app.post("/api/refresh-teams", async (req, res) => {
   try {
-    const output = await runPython("buildTeams.py", ["--merge"]);
-    res.json({ success: true, message: "Teams updated", output });
+    // --json: stdout is just the summary; progress goes to stderr
+    const summary = JSON.parse(await runPython("buildTeams.py", ["--merge", "--json"]));
+    if (!summary.success) {
+      return res.status(502).json({ success: false, error: summary.error, summary });
+    }
+    const message = summary.changed.length
+      ? `Updated ${summary.changed.length} team records`
+      : "Team records already up to date";
+    res.json({ success: true, message, summary });
   } catch (err) {
     res.status(500).json({ success: false, error: err.message });
   }
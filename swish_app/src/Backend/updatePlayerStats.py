@@ -1,45 +1,169 @@
 """
 Update player stats in players.json (FAST VERSION)
 Only updates stats, keeps all other player data
-Run: python updatePlayerStats.py
+Run: python updatePlayerStats.py [--per-player]
+
+Stats for the whole league come from one LeagueDashPlayerStats call (season
+totals, divided by GP here). Players missing from it fall back to a
+PlayerCareerStats call each; --per-player uses that path for everyone.
+Those calls run on WORKERS threads sharing one rate limit (see ratelimit.py).
+Both paths turn totals into players.json fields with season_stats(), column-wise
+over the whole frame, so a player gets the same values either way.
+
+Every fetched player is appended to data/players.journal.jsonl as it arrives.
+An interrupted run picks up from there: players refreshed within FRESH_HOURS
+are not fetched again (--restart ignores the journal). At the end the journal
+is merged in one pass into the player store (data/players.sqlite, see
+player_store.py), only changed rows are written, and players.json is exported
+from the store. The journal is then removed.
 """
 
+import argparse
 import json
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from nba_api.stats.endpoints import playercareerstats
 
-DELAY = 0.6  # 600ms between calls
+import cassette  # SWISH_HTTP=record|replay; before metrics so replays are counted
+import metrics
+import player_store
+import ratelimit
+from core import get_current_season, lazy_import
+
+leaguedashplayerstats = lazy_import("nba_api.stats.endpoints.leaguedashplayerstats")
+playercareerstats = lazy_import("nba_api.stats.endpoints.playercareerstats")
+np = lazy_import("numpy")
+
+METRICS_PATH = Path('data/players.metrics.json')
+JOURNAL_PATH = Path('data/players.journal.jsonl')
+STORE_PATH = Path('data/players.sqlite')
+
+FRESH_HOURS = 12  # journal entries younger than this are not refetched
+BACKUPS = 3  # previous players.json versions kept in data/.backups/
+
+MAX_RATE = 1 / 0.6  # requests/s; the budget the old 600ms sleep between calls kept to
+WORKERS = 4  # overlap request latency, not exceed MAX_RATE
 MAX_RETRIES = 3
-RETRY_DELAY = 5
+BACKOFF_BASE = 2.0  # seconds; doubled per retry, with jitter
 
-def get_current_season():
-    """Get the actual current NBA season"""
-    now = datetime.now()
-    year = now.year
-    month = now.month
-    
-    if month >= 10:
-        season = f"{year}-{str(year+1)[-2:]}"
-    else:
-        season = f"{year-1}-{str(year)[-2:]}"
-    
-    return season
+_bucket = ratelimit.TokenBucket(MAX_RATE)
+_breaker = ratelimit.CircuitBreaker(threshold=5, cooldown=30)
+
+# players.json field -> season-totals column, divided by GP
+PER_GAME_STATS = {
+    'mpg': 'MIN', 'ppg': 'PTS', 'rpg': 'REB', 'apg': 'AST', 'spg': 'STL',
+    'bpg': 'BLK', 'topg': 'TOV', 'fgm': 'FGM', 'fga': 'FGA', 'fg3m': 'FG3M',
+    'fg3a': 'FG3A', 'ftm': 'FTM', 'fta': 'FTA', 'oreb': 'OREB', 'dreb': 'DREB',
+    'pf': 'PF',
+}
+# players.json field -> fraction column, stored as a percentage
+PCT_STATS = {'fgpct': 'FG_PCT', 'fg3pct': 'FG3_PCT', 'ftpct': 'FT_PCT'}
+STAT_KEYS = ['gp', 'mpg', 'ppg', 'rpg', 'apg', 'spg', 'bpg', 'topg',
+             'fgpct', 'fg3pct', 'ftpct', 'fgm', 'fga', 'fg3m', 'fg3a',
+             'ftm', 'fta', 'oreb', 'dreb', 'pf']
+
+class ProgressJournal:
+    """Append-only log of fetched stats, one JSON line per (player id, season)"""
+
+    def __init__(self, path, season):
+        self.path = Path(path)
+        self.season = season
+        self._file = None
+
+    def load(self, fresh_hours):
+        """{player id: stats} for this season's entries within the window; latest wins"""
+        entries = {}
+        if not self.path.exists():
+            return entries
+        cutoff = time.time() - fresh_hours * 3600
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line from a killed run
+                if entry['season'] == self.season and entry['at'] >= cutoff:
+                    entries[entry['id']] = entry['stats']
+        return entries
+
+    def append(self, items):
+        """Append (player id, stats) pairs and flush them to disk"""
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            torn = False
+            if self.path.exists() and self.path.stat().st_size:
+                with open(self.path, 'rb') as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b'\n'
+            self._file = open(self.path, 'a')
+            # Terminate a torn line so the next entry starts cleanly
+            if torn:
+                self._file.write('\n')
+        now = time.time()
+        for player_id, stats in items:
+            self._file.write(json.dumps({'id': player_id, 'season': self.season, 'at': now,
+                                         'stats': stats}, separators=(',', ':')) + '\n')
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        self.path.unlink(missing_ok=True)
 
 def fetch_with_retry(func, description="API call"):
-    """Retry API calls that fail"""
-    for attempt in range(MAX_RETRIES):
-        try:
-            result = func()
-            time.sleep(DELAY)
-            return result
-        except Exception as e:
-            if attempt < MAX_RETRIES - 1:
-                print(f"      ⚠️  Retry {attempt + 1}/{MAX_RETRIES}...")
-                time.sleep(RETRY_DELAY)
-            else:
-                raise e
+    """Run an API call within the shared rate limit, retrying failures with backoff"""
+    return ratelimit.call(func, _bucket, _breaker, MAX_RETRIES, BACKOFF_BASE, description)
+
+def _round_half_up(tenths):
+    """Values in tenths -> one decimal, halves up (3.5 tenths -> 0.4)"""
+    return np.floor(tenths + 0.5) / 10
+
+def season_stats(totals):
+    """players.json stat fields for each row of a season-totals frame (GP > 0), as dicts
+
+    Per-game values are totals / GP and percentages are the API's fractions * 100,
+    both rounded to one decimal with halves up: 7 points in 20 games is 0.4.
+    A 0 (or missing) percentage is stored as null.
+    """
+    gp = totals['GP']
+    # Scale before dividing, so 7 / 20 is exactly 3.5 tenths rather than 0.35 * 10
+    per_game = _round_half_up(totals[list(PER_GAME_STATS.values())].mul(10).div(gp, axis=0))
+    pct = totals[list(PCT_STATS.values())]
+    pct = _round_half_up(pct * 1000).where(pct.fillna(0) != 0)
+
+    stats = totals[[]].assign(gp=gp.astype(int))
+    stats[list(PER_GAME_STATS)] = per_game.to_numpy()
+    stats[list(PCT_STATS)] = pct.to_numpy()
+    stats = stats[STAT_KEYS]
+    return stats.astype(object).where(stats.notna(), None).to_dict('records')
+
+def fetch_league_stats(season):
+    """Per-game stats for every player with a game this season, keyed by player id.
+
+    One LeagueDashPlayerStats call; returns {} if it fails.
+    """
+    try:
+        def _fetch():
+            return leaguedashplayerstats.LeagueDashPlayerStats(
+                season=season,
+                season_type_all_star='Regular Season',
+                per_mode_detailed='Totals',
+                timeout=60,
+            )
+
+        df = fetch_with_retry(_fetch, "league-wide stats").get_data_frames()[0]
+    except Exception as e:
+        print(f"⚠️  League-wide stats unavailable: {str(e)[:80]}")
+        return {}
+
+    df = df[df['GP'] > 0]
+    return dict(zip(df['PLAYER_ID'].astype(int), season_stats(df)))
 
 def get_player_stats(player_id, player_name, season):
     """Get current season stats for a player"""
@@ -62,40 +186,64 @@ def get_player_stats(player_id, player_name, season):
         if current_season_df.empty:
             return None
 
-        current_season = current_season_df.iloc[0]
-        games_played = current_season['GP']
-
-        if games_played == 0:
+        # The same column-wise helper as the league-wide path, on a one-row frame
+        current_season = current_season_df.iloc[:1]
+        if current_season['GP'].iloc[0] == 0:
             return None
-        
-        # Calculate per-game averages
-        return {
-            'gp': int(games_played),
-            'mpg': round(current_season['MIN'] / games_played, 1),
-            'ppg': round(current_season['PTS'] / games_played, 1),
-            'rpg': round(current_season['REB'] / games_played, 1),
-            'apg': round(current_season['AST'] / games_played, 1),
-            'spg': round(current_season['STL'] / games_played, 1),
-            'bpg': round(current_season['BLK'] / games_played, 1),
-            'topg': round(current_season['TOV'] / games_played, 1),
-            'fgpct': round(current_season['FG_PCT'] * 100, 1) if current_season['FG_PCT'] else None,
-            'fg3pct': round(current_season['FG3_PCT'] * 100, 1) if current_season['FG3_PCT'] else None,
-            'ftpct': round(current_season['FT_PCT'] * 100, 1) if current_season['FT_PCT'] else None,
-            'fgm': round(current_season['FGM'] / games_played, 1),
-            'fga': round(current_season['FGA'] / games_played, 1),
-            'fg3m': round(current_season['FG3M'] / games_played, 1),
-            'fg3a': round(current_season['FG3A'] / games_played, 1),
-            'ftm': round(current_season['FTM'] / games_played, 1),
-            'fta': round(current_season['FTA'] / games_played, 1),
-            'oreb': round(current_season['OREB'] / games_played, 1),
-            'dreb': round(current_season['DREB'] / games_played, 1),
-            'pf': round(current_season['PF'] / games_played, 1),
-        }
+
+        return season_stats(current_season)[0]
+    except ratelimit.CircuitOpen:
+        raise
     except Exception as e:
-        print(f"      ❌ Failed: {str(e)[:50]}")
+        print(f"      ❌ {player_name}: {str(e)[:50]}")
         return None
 
-def update_player_stats():
+def fetch_stats(players, season, bulk, journal):
+    """Fetch stats for `players`, appending each result to the journal as it arrives"""
+    league_stats = {}
+    if bulk and players:
+        with metrics.span("fetch_league_stats"):
+            league_stats = fetch_league_stats(season)
+        covered = [(p['id'], league_stats[p['id']]) for p in players if p['id'] in league_stats]
+        journal.append(covered)
+        print(f"📦 League-wide stats: {len(covered)} players, "
+              f"{len(players) - len(covered)} to fetch individually\n")
+
+    # Per-player fallback for everyone the league-wide call didn't cover
+    fallback = [p for p in players if p['id'] not in league_stats]
+    with metrics.span("fetch_stats"):
+        if fallback:
+            print(f"🔁 Fetching {len(fallback)} players individually "
+                  f"({WORKERS} workers, ≤{MAX_RATE:.2f} req/s)\n")
+        progress = ratelimit.Progress(len(fallback), "players")
+        pool = ThreadPoolExecutor(max_workers=WORKERS)
+        futures = {
+            pool.submit(get_player_stats, p['id'], p['full_name'], season): p
+            for p in fallback
+        }
+        pending = set(futures)
+        try:
+            for future in as_completed(futures):
+                pending.discard(future)
+                # CircuitOpen propagates: better to keep yesterday's file than
+                # to clear every player's stats because the API is down
+                stats = future.result()
+                # Misses aren't journaled, so a resumed run retries them
+                if stats:
+                    journal.append([(futures[future]['id'], stats)])
+                metrics.count("per_player_fetches")
+                progress.tick()
+        except BaseException:
+            # Ctrl-C or CircuitOpen: drop the queue instead of draining it, keep
+            # whatever already finished so a resumed run skips it, and re-raise
+            pool.shutdown(wait=False, cancel_futures=True)
+            journal.append([(futures[f]['id'], f.result()) for f in pending
+                            if f.done() and not f.cancelled() and f.exception() is None
+                            and f.result()])
+            raise
+        pool.shutdown()
+
+def update_player_stats(bulk=True, fresh_hours=FRESH_HOURS, resume=True):
     """Update stats for all players in players.json"""
     
     season = get_current_season()
@@ -106,9 +254,10 @@ def update_player_stats():
         return False
     
     # Load existing players
-    print(f"📂 Loading {players_path}")
-    with open(players_path, 'r') as f:
-        players = json.load(f)
+    print(f"📂 Loading {STORE_PATH}")
+    with metrics.span("load"):
+        store = player_store.open_store(STORE_PATH, players_path)
+        players = store.all()
     
     print(f"📊 Found {len(players)} players")
     print(f"📅 Season: {season}")
@@ -117,56 +266,63 @@ def update_player_stats():
     updated_count = 0
     failed_count = 0
     skipped_count = 0
-    
-    # Update each player
-    for i, player in enumerate(players):
-        player_id = player['id']
-        player_name = player['full_name']
+
+    journal = ProgressJournal(JOURNAL_PATH, season)
+    if not resume:
+        journal.remove()
+    try:
+        done = journal.load(fresh_hours)
+        if done:
+            print(f"♻️  Resuming: {len(done)} players already refreshed "
+                  f"in the last {fresh_hours}h\n")
+            metrics.count("journal_skips", len(done))
+        fetch_stats([p for p in players if p['id'] not in done], season, bulk, journal)
+    finally:
+        journal.close()
+
+    # Merge the journal into the store in one pass
+    refreshed = journal.load(fresh_hours)
+    changes = {}
+    with metrics.span("apply"):
+        for i, player in enumerate(players):
+            player_id = player['id']
+            player_name = player['full_name']
         
-        print(f"[{i+1}/{len(players)}] {player_name}...")
+            print(f"[{i+1}/{len(players)}] {player_name}...")
         
-        # Get fresh stats
-        new_stats = get_player_stats(player_id, player_name, season)
+            # Get fresh stats
+            new_stats = refreshed.get(player_id)
         
-        if new_stats:
-            # Check if stats actually changed
-            old_ppg = player.get('ppg', 0)
-            new_ppg = new_stats.get('ppg', 0)
-
-            # Update all stat fields and mark active
-            player.update(new_stats)
-            player['active'] = new_stats['gp'] > 0
-
-            if old_ppg != new_ppg:
-                print(f"    ✓ Updated: {old_ppg} → {new_ppg} PPG ({new_stats['gp']} GP)")
-                updated_count += 1
+            if new_stats:
+                # Check if stats actually changed
+                old_ppg = player.get('ppg', 0)
+                new_ppg = new_stats.get('ppg', 0)
+
+                # Update all stat fields and mark active
+                changes[player_id] = {**new_stats, 'active': new_stats['gp'] > 0}
+
+                if old_ppg != new_ppg:
+                    print(f"    ✓ Updated: {old_ppg} → {new_ppg} PPG ({new_stats['gp']} GP)")
+                    updated_count += 1
+                else:
+                    print(f"    - No change: {new_ppg} PPG")
+                    skipped_count += 1
             else:
-                print(f"    - No change: {new_ppg} PPG")
-                skipped_count += 1
-        else:
-            print(f"    ⚠️  No stats available — marking inactive and clearing stats")
-            player['active'] = False
-            for stat_key in ['gp', 'mpg', 'ppg', 'rpg', 'apg', 'spg', 'bpg', 'topg',
-                             'fgpct', 'fg3pct', 'ftpct', 'fgm', 'fga', 'fg3m', 'fg3a',
-                             'ftm', 'fta', 'oreb', 'dreb', 'pf']:
-                player.pop(stat_key, None)
-            failed_count += 1
-        
-        # Progress update every 50 players
-        if (i + 1) % 50 == 0:
-            elapsed = datetime.now()
-            print(f"\n--- Progress: {i+1}/{len(players)} complete ({elapsed.strftime('%H:%M:%S')}) ---\n")
-    
-    # Save updated players.json
-    backup_path = players_path.with_suffix('.json.backup')
+                print(f"    ⚠️  No stats available — marking inactive and clearing stats")
+                changes[player_id] = {**dict.fromkeys(STAT_KEYS), 'active': False}
+                failed_count += 1
     
-    print(f"\n💾 Creating backup: {backup_path}")
-    with open(backup_path, 'w') as f:
-        json.dump(players, f, indent=2)
-    
-    print(f"💾 Saving updated data: {players_path}")
-    with open(players_path, 'w') as f:
-        json.dump(players, f, indent=2)
+    # Write changed rows, then export players.json (the previous version goes to data/.backups/)
+    with metrics.span("save"):
+        changed = store.update_many(changes)
+        metrics.count("rows_changed", len(changed))
+        print(f"\n🗃️  {len(changed)} changed rows written to {STORE_PATH}")
+        if store.export_json(players_path, backups=BACKUPS):
+            print(f"💾 Exported {players_path}")
+        else:
+            print(f"💾 {players_path} unchanged, nothing to write")
+        journal.remove()
+    store.close()
     
     print("\n" + "="*60)
     print("SUMMARY")
@@ -180,12 +336,22 @@ def update_player_stats():
     return True
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Update player stats in players.json")
+    parser.add_argument('--per-player', action='store_true',
+                        help="skip the league-wide call and fetch every player individually")
+    parser.add_argument('--fresh-hours', type=float, default=FRESH_HOURS,
+                        help=f"resume: skip players refreshed this recently (default {FRESH_HOURS})")
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore the progress journal and refetch everyone")
+    args = parser.parse_args()
+
     try:
         print("="*60)
         print("NBA PLAYER STATS UPDATER")
         print("="*60 + "\n")
         
-        success = update_player_stats()
+        success = update_player_stats(bulk=not args.per_player, fresh_hours=args.fresh_hours,
+                                      resume=not args.restart)
         
         if success:
             print("\n✅ SUCCESS - Player stats updated!")
@@ -194,7 +360,11 @@ if __name__ == '__main__':
             
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
+        if JOURNAL_PATH.exists():
+            print(f"   Progress kept in {JOURNAL_PATH}; rerun to resume")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        metrics.write(METRICS_PATH, script="updatePlayerStats.py")
\ No newline at end of file